@@ -0,0 +1,195 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
+
+from game.chess_board import ChessBoard, START_FEN
+from game.engine import Engine, MATE_BOUND
+from game.pgn import parse_san, read_games
+from game.tablebase import Tablebases
+
+
+BATCH_SIZE = 25
+BLUNDER_THRESHOLD = 200
+
+_engine = None
+
+
+def _init_worker(hash_mb):
+    global _engine
+    _engine = Engine(time_limit=0, hash_mb=hash_mb, tablebases=Tablebases())
+
+
+def _evaluate(board, depth, stats):
+    color = board.current_player
+    if not board.has_legal_moves(color):
+        return -MATE_BOUND if board.is_check(color) else 0
+    result = _engine.search(board, time_limit=0, max_depth=depth)
+    stats['nodes'] += result['nodes']
+    return max(-MATE_BOUND, min(MATE_BOUND, result['score']))
+
+
+def analyze_game(index, game, depth=0):
+    stats = {
+        'index': index,
+        'white': game.headers.get('White', '?'),
+        'black': game.headers.get('Black', '?'),
+        'result': game.result,
+        'plies': 0,
+        'checks': 0,
+        'outcome': None,
+        'blunders': {'white': 0, 'black': 0},
+        'nodes': 0,
+        'error': None,
+    }
+    board = None
+    try:
+        board = ChessBoard(game.headers.get('FEN', START_FEN))
+        # Scores are from the side to move, so the loss of the move between
+        # two positions is score_before + score_after.
+        score = _evaluate(board, depth, stats) if depth else 0
+        for san in game.moves:
+            mover = board.current_player
+            board.make_move(*parse_san(board, san))
+            stats['plies'] += 1
+            if board.is_check(board.current_player):
+                stats['checks'] += 1
+            if depth:
+                next_score = _evaluate(board, depth, stats)
+                if score + next_score >= BLUNDER_THRESHOLD:
+                    stats['blunders'][mover] += 1
+                score = next_score
+    except ValueError as e:
+        stats['error'] = str(e)
+        if board is None:
+            return stats
+
+    color = board.current_player
+    if board.is_checkmate(color):
+        stats['outcome'] = 'checkmate'
+    elif board.is_stalemate(color):
+        stats['outcome'] = 'stalemate'
+    return stats
+
+
+def analyze_batch(batch, depth):
+    start = time.perf_counter()
+    games = [analyze_game(index, game, depth) for index, game in batch]
+    return os.getpid(), time.perf_counter() - start, games
+
+
+def _batches(games, size):
+    while True:
+        batch = list(islice(games, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run(path, workers, depth=0, limit=None, batch_size=BATCH_SIZE, hash_mb=8, progress=True):
+    workers = workers or os.cpu_count() or 1
+    per_worker = {}
+    games = []
+    start = time.perf_counter()
+
+    def collect(futures):
+        for future in futures:
+            pid, seconds, batch = future.result()
+            worker = per_worker.setdefault(pid, {'pid': pid, 'batches': 0, 'games': 0,
+                                                 'plies': 0, 'nodes': 0, 'seconds': 0.0})
+            worker['batches'] += 1
+            worker['games'] += len(batch)
+            worker['plies'] += sum(game['plies'] for game in batch)
+            worker['nodes'] += sum(game['nodes'] for game in batch)
+            worker['seconds'] += seconds
+            games.extend(batch)
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"{len(games)} games, {len(games) / elapsed:.1f} games/s", file=sys.stderr)
+
+    context = multiprocessing.get_context('spawn')
+    with open(path, 'r', encoding='utf-8', errors='replace') as f, \
+            ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                initargs=(hash_mb,)) as pool:
+        # Keep a couple of batches queued per worker; the PGN file is read
+        # only as fast as the pool drains it.
+        pending = set()
+        for batch in _batches(enumerate(islice(read_games(f), limit)), batch_size):
+            pending.add(pool.submit(analyze_batch, batch, depth))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(pending)[0])
+
+    elapsed = time.perf_counter() - start
+    games.sort(key=lambda game: game['index'])
+    busy = sum(worker['seconds'] for worker in per_worker.values())
+    for worker in per_worker.values():
+        seconds = worker['seconds']
+        worker['seconds'] = round(seconds, 6)
+        worker['games_per_second'] = round(worker['games'] / seconds, 1) if seconds > 0 else None
+        worker['nps'] = int(worker['nodes'] / seconds) if seconds > 0 else None
+
+    return {
+        'suite': 'analyze',
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'pgn': path,
+        'workers': workers,
+        'depth': depth,
+        'games': len(games),
+        'plies': sum(game['plies'] for game in games),
+        'checks': sum(game['checks'] for game in games),
+        'checkmates': sum(1 for game in games if game['outcome'] == 'checkmate'),
+        'stalemates': sum(1 for game in games if game['outcome'] == 'stalemate'),
+        'blunders': {color: sum(game['blunders'][color] for game in games)
+                     for color in ('white', 'black')},
+        'nodes': sum(game['nodes'] for game in games),
+        'errors': sum(1 for game in games if game['error']),
+        'seconds': round(elapsed, 6),
+        'games_per_second': round(len(games) / elapsed, 1) if elapsed > 0 else None,
+        'speedup': round(busy / elapsed, 2) if elapsed > 0 else None,
+        'per_worker': sorted(per_worker.values(), key=lambda worker: worker['pid']),
+        'per_game': games,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze a PGN game collection on all CPU cores')
+    parser.add_argument('pgn', help='PGN file to analyze')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--depth', type=int, default=0,
+                        help='search every position to this depth to count blunders (0 to skip)')
+    parser.add_argument('--limit', type=int, help='stop after this many games')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='games per task')
+    parser.add_argument('--hash', type=int, default=8, help='transposition table size per worker, MB')
+    parser.add_argument('--summary', action='store_true', help='leave per-game results out of the report')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    report = run(args.pgn, args.workers, args.depth, args.limit, args.batch_size, args.hash)
+    if args.summary:
+        del report['per_game']
+
+    for worker in report['per_worker']:
+        print(f"worker {worker['pid']}: {worker['games']} games "
+              f"{worker['games_per_second'] or 0:>8} games/s {worker['nps'] or 0:>9} nps",
+              file=sys.stderr)
+    print(f"total: {report['games']} games in {report['seconds']:.2f}s "
+          f"({report['games_per_second']} games/s, speedup {report['speedup']}x)", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0 if not report['errors'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+
+from game.batch_eval import evaluate_packed, pack_positions
+from game.chess_board import PROMOTIONS, ChessBoard
+from game.evaluation import evaluate_position
+from perft import POSITIONS
+
+
+def random_positions(count, max_plies, seed):
+    # Random playouts from the perft positions give a spread of openings,
+    # middlegames and the odd promoted piece.
+    rng = random.Random(seed)
+    fens = [position['fen'] for position in POSITIONS]
+    boards = []
+    while len(boards) < count:
+        board = ChessBoard(rng.choice(fens))
+        for _ in range(rng.randint(0, max_plies)):
+            moves = board.generate_legal_moves()
+            if not moves:
+                break
+            from_pos, to_pos = rng.choice(moves)
+            board.make_move(from_pos, to_pos, rng.choice(PROMOTIONS))
+        boards.append(ChessBoard(board.get_fen()))
+    return boards
+
+
+def measure_scalar(boards):
+    start = time.perf_counter()
+    scores = [evaluate_position(board) for board in boards]
+    return scores, time.perf_counter() - start
+
+
+def measure_batch(boards, batch_size):
+    scores = []
+    pack_seconds = eval_seconds = 0.0
+    for i in range(0, len(boards), batch_size):
+        start = time.perf_counter()
+        packed = pack_positions(boards[i:i + batch_size])
+        packed_at = time.perf_counter()
+        scores.extend(evaluate_packed(packed).tolist())
+        pack_seconds += packed_at - start
+        eval_seconds += time.perf_counter() - packed_at
+    return scores, pack_seconds, eval_seconds
+
+
+def rate(count, seconds):
+    return int(count / seconds) if seconds > 0 else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scalar against NumPy batch evaluation benchmark')
+    parser.add_argument('--positions', type=int, default=20000, help='random positions to evaluate')
+    parser.add_argument('--plies', type=int, default=60, help='longest random playout')
+    parser.add_argument('--batch', type=int, default=4096, help='positions per batch')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    boards = random_positions(args.positions, args.plies, args.seed)
+    scalar, scalar_seconds = measure_scalar(boards)
+    batch, pack_seconds, eval_seconds = measure_batch(boards, args.batch)
+    mismatches = [{'fen': board.get_fen(), 'scalar': a, 'batch': b}
+                  for board, a, b in zip(boards, scalar, batch) if a != b]
+    batch_seconds = pack_seconds + eval_seconds
+    report = {
+        'suite': 'eval',
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'positions': len(boards),
+        'batch_size': args.batch,
+        'scalar': {'seconds': round(scalar_seconds, 6),
+                   'positions_per_second': rate(len(boards), scalar_seconds)},
+        'batch': {'seconds': round(batch_seconds, 6),
+                  'pack_seconds': round(pack_seconds, 6),
+                  'eval_seconds': round(eval_seconds, 6),
+                  'positions_per_second': rate(len(boards), batch_seconds)},
+        'speedup': round(scalar_seconds / batch_seconds, 2) if batch_seconds > 0 else None,
+        'mismatches': mismatches[:10],
+        'ok': not mismatches,
+    }
+
+    print(f"scalar: {report['scalar']['positions_per_second']} positions/s", file=sys.stderr)
+    print(f"batch:  {report['batch']['positions_per_second']} positions/s "
+          f"(x{report['speedup']})", file=sys.stderr)
+    if mismatches:
+        print(f"{len(mismatches)} positions score differently", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0 if report['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from game.chess_board import ChessBoard
+from perft import POSITIONS
+
+
+def measure_memory(fens, copies):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    boards = [ChessBoard(fen) for _ in range(copies) for fen in fens]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total_bytes = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    pieces = {id(piece) for board in boards for row in board.board for piece in row
+              if piece is not None}
+    return {
+        'boards': len(boards),
+        'bytes_per_board': total_bytes // len(boards),
+        'piece_objects': len(pieces),
+    }
+
+
+def measure_moves(fens, repeat):
+    # The generator gameplay and search actually run: the bitboard legal
+    # move list for the side to move.
+    boards = [ChessBoard(fen) for fen in fens]
+    calls = moves = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            moves += len(board.legal_moves())
+            calls += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'calls': calls,
+        'moves': moves,
+        'seconds': round(elapsed, 6),
+        'calls_per_second': int(calls / elapsed) if elapsed > 0 else None,
+        'moves_per_second': int(moves / elapsed) if elapsed > 0 else None,
+    }
+
+
+def measure_setup(fens, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for fen in fens:
+            ChessBoard(fen)
+    elapsed = time.perf_counter() - start
+    count = repeat * len(fens)
+    return {
+        'boards': count,
+        'seconds': round(elapsed, 6),
+        'boards_per_second': int(count / elapsed) if elapsed > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Piece object memory and legal move generation benchmark')
+    parser.add_argument('--copies', type=int, default=200, help='boards per position for the memory test')
+    parser.add_argument('--repeat', type=int, default=2000, help='passes over every position for the speed test')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    fens = [position['fen'] for position in POSITIONS]
+    report = {
+        'suite': 'pieces',
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'memory': measure_memory(fens, args.copies),
+        'moves': measure_moves(fens, args.repeat),
+        'setup': measure_setup(fens, max(1, args.repeat // 10)),
+    }
+
+    print(f"memory: {report['memory']['bytes_per_board']} bytes/board, "
+          f"{report['memory']['piece_objects']} piece objects", file=sys.stderr)
+    print(f"moves:  {report['moves']['calls_per_second']} legal_moves calls/s, "
+          f"{report['moves']['moves_per_second']} moves/s", file=sys.stderr)
+    print(f"setup:  {report['setup']['boards_per_second']} boards/s", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+
+IMPORT_BUDGET_MS = 150
+STARTUP_BUDGET_MS = 1000
+
+CORE_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'pygame': 'pygame' in sys.modules}}))
+'''
+
+UI_PROBE = '''
+import json, os, time
+start = time.perf_counter()
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+from ui.game_ui import ChessUI
+imported = time.perf_counter()
+ui = ChessUI()
+created = time.perf_counter()
+ui.render()
+print(json.dumps({'import': imported - start, 'init': created - imported,
+                  'first_frame': time.perf_counter() - start}))
+'''
+
+
+def core_modules():
+    return sorted('game.' + os.path.splitext(os.path.basename(path))[0]
+                  for path in glob.glob(os.path.join('game', '*.py')))
+
+
+def probe(code, repeat):
+    # Fresh interpreters, so every import is a cold import; the best run is
+    # kept to filter out scheduler noise.
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold import and UI startup time budget')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, best is kept')
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS,
+                        help='ms allowed for importing any one game module')
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_MS,
+                        help='ms allowed from importing the UI to its first frame')
+    parser.add_argument('--skip-ui', action='store_true', help='measure only the game package')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    modules = []
+    for module in core_modules():
+        runs = probe(CORE_PROBE.format(module=module), args.repeat)
+        ms = min(run['seconds'] for run in runs) * 1000
+        modules.append({
+            'module': module,
+            'ms': round(ms, 3),
+            'pygame': any(run['pygame'] for run in runs),
+            'ok': ms <= args.import_budget and not any(run['pygame'] for run in runs),
+        })
+
+    ui = None
+    if not args.skip_ui:
+        runs = probe(UI_PROBE, args.repeat)
+        best = min(runs, key=lambda run: run['first_frame'])
+        ui = {key: round(value * 1000, 3) for key, value in best.items()}
+        ui['ok'] = ui['first_frame'] <= args.startup_budget
+
+    report = {
+        'suite': 'startup',
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'import_budget_ms': args.import_budget,
+        'startup_budget_ms': args.startup_budget,
+        'modules': modules,
+        'ui': ui,
+        'ok': all(module['ok'] for module in modules) and (ui is None or ui['ok']),
+    }
+
+    for module in modules:
+        status = 'ok' if module['ok'] else ('FAIL (imports pygame)' if module['pygame'] else 'FAIL')
+        print(f"{module['module']:<22} {module['ms']:>8.1f} ms  {status}", file=sys.stderr)
+    if ui is not None:
+        print(f"{'ui first frame':<22} {ui['first_frame']:>8.1f} ms  "
+              f"(import {ui['import']:.1f}, init {ui['init']:.1f})  "
+              f"{'ok' if ui['ok'] else 'FAIL'}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0 if report['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
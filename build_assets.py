@@ -0,0 +1,20 @@
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from ui.assets import ATLAS_INDEX, build_atlas
+
+
+def main():
+    pygame.init()
+    path = build_atlas()
+    print(f"{path}: {os.path.getsize(path)} bytes, index {ATLAS_INDEX}")
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .bitboard import COLUMN_MASKS, FULL, PAWN, KNIGHT, BISHOP, ROOK, QUEEN
+from .evaluation import (DOUBLED_PAWN, ISOLATED_PAWN, MOBILITY_WEIGHTS, PASSED_PAWN, PHASE_TOTAL,
+                         PHASE_WEIGHTS, PIECE_VALUES, PST, SQUARE_SCORES_EG, SQUARE_SCORES_MG)
+
+
+PLANES = 12
+
+_KNIGHT_JUMPS = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+_ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+_BISHOP_DIRECTIONS = ((1, 1), (-1, 1), (1, -1), (-1, -1))
+_SLIDERS = ((BISHOP, _BISHOP_DIRECTIONS), (ROOK, _ROOK_DIRECTIONS),
+            (QUEEN, _BISHOP_DIRECTIONS + _ROOK_DIRECTIONS))
+
+
+def _step(dx, dy):
+    # The shift moving every bit by (dx, dy) and the squares it may land on
+    # without wrapping round from the other edge of the board.
+    wrapped = 0
+    for x in (range(dx) if dx > 0 else range(8 + dx, 8)):
+        wrapped |= COLUMN_MASKS[x]
+    return dy * 8 + dx, FULL ^ wrapped
+
+
+if np is not None:
+    # Planes are color * 6 + kind; the sign turns Black's planes negative.
+    _SIGNS = np.repeat(np.array([1, -1], dtype=np.int32), 6)
+    _MATERIAL = np.array(PIECE_VALUES * 2, dtype=np.int32) * _SIGNS
+    _PST = np.array([PST[kind] for kind in range(6)]
+                    + [[PST[kind][sq ^ 56] for sq in range(64)] for kind in range(6)],
+                    dtype=np.int32) * _SIGNS[:, None]
+    _PASSED_BONUS = (np.array(PASSED_PAWN[::-1], dtype=np.int32),
+                     np.array(PASSED_PAWN, dtype=np.int32))
+    # Columns are the tapered middlegame and endgame score of a piece on a square.
+    _TAPERED = np.stack([np.array(SQUARE_SCORES_MG, dtype=np.int32).reshape(-1),
+                         np.array(SQUARE_SCORES_EG, dtype=np.int32).reshape(-1)], axis=1)
+    _PHASE = np.array(PHASE_WEIGHTS * 2, dtype=np.int32)
+    _SHIFTS = {}
+    for _direction in _KNIGHT_JUMPS + _BISHOP_DIRECTIONS + _ROOK_DIRECTIONS:
+        _shift_by, _mask = _step(*_direction)
+        _SHIFTS[_direction] = (np.uint64(abs(_shift_by)), _shift_by > 0, np.uint64(_mask))
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("для пакетной оценки нужен numpy")
+
+
+def pack_positions(boards):
+    # (N, 12, 64) booleans, square index as on the board: a8 is 0, h1 is 63.
+    _require_numpy()
+    words = np.array([[mask for color in range(2) for mask in board.bitboards.pieces[color]]
+                      for board in boards], dtype='<u8').reshape(-1, PLANES)
+    bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')
+    return bits.reshape(-1, PLANES, 64).view(bool)
+
+
+def _words(packed):
+    return np.packbits(packed, axis=2, bitorder='little').view('<u8').reshape(-1, PLANES)
+
+
+def _popcount(words):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).astype(np.int32)
+    bits = np.unpackbits(words.astype('<u8').view(np.uint8).reshape(words.shape + (8,)), axis=-1)
+    return bits.sum(axis=-1, dtype=np.int32)
+
+
+def _shift(words, direction):
+    amount, left, mask = _SHIFTS[direction]
+    return ((words << amount) if left else (words >> amount)) & mask
+
+
+def _ray_attacks(sliders, empty, direction):
+    # Kogge-Stone fill: sliders spread over empty squares in three doubling
+    # steps, then one more step takes in the blocker.
+    amount, left, mask = _SHIFTS[direction]
+    propagate = empty & mask
+    for step in (amount, amount * np.uint64(2), amount * np.uint64(4)):
+        if left:
+            sliders = sliders | (propagate & (sliders << step))
+            propagate = propagate & (propagate << step)
+        else:
+            sliders = sliders | (propagate & (sliders >> step))
+            propagate = propagate & (propagate >> step)
+    return _shift(sliders, direction)
+
+
+def _side_mobility(words, color, empty):
+    base = 6 * color
+    own = np.bitwise_or.reduce(words[:, base:base + 6], axis=1)
+    not_own = ~own
+    # Counting each jump or ray direction on its own keeps every piece's
+    # squares apart: one jump maps distinct knights to distinct squares, and
+    # a ray stops at the first piece, so two sliders never reach the same
+    # square moving the same way.
+    knights = words[:, base + KNIGHT]
+    score = np.zeros(len(words), dtype=np.int32)
+    for jump in _KNIGHT_JUMPS:
+        score += MOBILITY_WEIGHTS[KNIGHT] * _popcount(_shift(knights, jump) & not_own)
+    for kind, directions in _SLIDERS:
+        sliders = words[:, base + kind]
+        for direction in directions:
+            score += MOBILITY_WEIGHTS[kind] * _popcount(_ray_attacks(sliders, empty, direction) & not_own)
+    return score
+
+
+def _side_pawns(own, their, color):
+    # own/their are (N, 8, 8) pawn grids indexed [row y, column x].
+    files = own.sum(axis=1, dtype=np.int32)
+    score = DOUBLED_PAWN * np.maximum(files - 1, 0).sum(axis=1)
+    occupied_files = files > 0
+    neighbours = np.zeros_like(occupied_files)
+    neighbours[:, 1:] |= occupied_files[:, :-1]
+    neighbours[:, :-1] |= occupied_files[:, 1:]
+    score += ISOLATED_PAWN * (files * ~neighbours).sum(axis=1)
+
+    # blocked[n, y, x]: an enemy pawn stands ahead of (y, x) on files x-1..x+1;
+    # ahead is towards row 0 for White and towards row 7 for Black.
+    span = their.copy()
+    span[:, :, 1:] |= their[:, :, :-1]
+    span[:, :, :-1] |= their[:, :, 1:]
+    blocked = np.zeros_like(span)
+    if color == 0:
+        blocked[:, 1:] = np.logical_or.accumulate(span, axis=1)[:, :-1]
+    else:
+        blocked[:, :-1] = np.logical_or.accumulate(span[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    passed = (own & ~blocked).sum(axis=2, dtype=np.int32)
+    score += passed @ _PASSED_BONUS[color]
+    return score
+
+
+def evaluate_terms_packed(packed):
+    # Each term as an (N,) array from White's side, keyed as in
+    # evaluation.evaluate_terms.
+    _require_numpy()
+    words = _words(packed)
+    empty = ~np.bitwise_or.reduce(words, axis=1)
+    grids = packed.reshape(-1, PLANES, 8, 8)
+    white_pawns = grids[:, PAWN]
+    black_pawns = grids[:, 6 + PAWN]
+    return {
+        'material': packed.sum(axis=2, dtype=np.int32) @ _MATERIAL,
+        'pst': np.einsum('npq,pq->n', packed.astype(np.int32), _PST),
+        'mobility': _side_mobility(words, 0, empty) - _side_mobility(words, 1, empty),
+        'pawns': _side_pawns(white_pawns, black_pawns, 0) - _side_pawns(black_pawns, white_pawns, 1),
+    }
+
+
+def evaluate_packed(packed):
+    # Scores from White's side, equal to evaluation.evaluate_position.
+    return sum(evaluate_terms_packed(packed).values())
+
+
+def evaluate_batch(boards):
+    return evaluate_packed(pack_positions(boards))
+
+
+def evaluate_tapered_packed(packed):
+    # Scores from White's side, equal to evaluation.evaluate_tapered.
+    _require_numpy()
+    mg, eg = (packed.reshape(len(packed), PLANES * 64).astype(np.int32) @ _TAPERED).T
+    phase = np.minimum(packed.sum(axis=2, dtype=np.int32) @ _PHASE, PHASE_TOTAL)
+    return (mg * phase + eg * (PHASE_TOTAL - phase)) // PHASE_TOTAL
+
+
+def evaluate_tapered_batch(boards):
+    return evaluate_tapered_packed(pack_positions(boards))
@@ -0,0 +1,350 @@
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLOR_INDEX = {'white': WHITE, 'black': BLACK}
+COLOR_NAMES = ('white', 'black')
+
+FULL = 0xFFFFFFFFFFFFFFFF
+
+
+def square(x, y):
+    return y * 8 + x
+
+
+def square_position(sq):
+    return sq & 7, sq >> 3
+
+
+def bit(x, y):
+    return 1 << (y * 8 + x)
+
+
+SQUARE_POSITIONS = [square_position(sq) for sq in range(64)]
+ROW_MASKS = [0xFF << (8 * y) for y in range(8)]
+COLUMN_MASKS = [0x0101010101010101 << x for x in range(8)]
+
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def _leaper_table(offsets):
+    table = []
+    for sq in range(64):
+        x, y = square_position(sq)
+        mask = 0
+        for dx, dy in offsets:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 8 and 0 <= ny < 8:
+                mask |= bit(nx, ny)
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table([(2, 1), (2, -1), (-2, 1), (-2, -1),
+                                (1, 2), (1, -2), (-1, 2), (-1, -2)])
+KING_ATTACKS = _leaper_table([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                              if dx or dy])
+# White pawns advance towards y == 0, black pawns towards y == 7.
+PAWN_ATTACKS = (_leaper_table([(-1, -1), (1, -1)]),
+                _leaper_table([(-1, 1), (1, 1)]))
+
+
+def _ray(sq, dx, dy, occupied):
+    x, y = square_position(sq)
+    mask = 0
+    while True:
+        x, y = x + dx, y + dy
+        if not (0 <= x < 8 and 0 <= y < 8):
+            return mask
+        mask |= bit(x, y)
+        if occupied & bit(x, y):
+            return mask
+
+
+def _inner_ray(sq, dx, dy):
+    # The last square of a ray is attacked whatever stands on it, so it never
+    # takes part in the occupancy index.
+    ray = _ray(sq, dx, dy, 0)
+    x, y = square_position(sq)
+    while 0 <= x + dx < 8 and 0 <= y + dy < 8:
+        x, y = x + dx, y + dy
+    return ray & ~bit(x, y) if ray else 0
+
+
+def _line_tables(directions):
+    masks = []
+    attacks = []
+    for sq in range(64):
+        mask = 0
+        for dx, dy in directions:
+            mask |= _inner_ray(sq, dx, dy)
+        table = {}
+        subset = 0
+        while True:
+            table[subset] = 0
+            for dx, dy in directions:
+                table[subset] |= _ray(sq, dx, dy, subset)
+            subset = (subset - mask) & mask
+            if subset == 0:
+                break
+        masks.append(mask)
+        attacks.append(table)
+    return masks, attacks
+
+
+# Kindergarten-style sliding attacks: every line through a square (rank, file,
+# diagonal, anti-diagonal) has its own table indexed by the occupancy of that
+# line alone, so a rook or bishop lookup is two table probes.
+RANK_MASKS, RANK_ATTACKS = _line_tables([(1, 0), (-1, 0)])
+FILE_MASKS, FILE_ATTACKS = _line_tables([(0, 1), (0, -1)])
+DIAG_MASKS, DIAG_ATTACKS = _line_tables([(1, 1), (-1, -1)])
+ANTI_MASKS, ANTI_ATTACKS = _line_tables([(1, -1), (-1, 1)])
+
+
+def _between_table():
+    table = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if not (dx or dy):
+                    continue
+                x, y = square_position(sq)
+                mask = 0
+                while 0 <= x + dx < 8 and 0 <= y + dy < 8:
+                    x, y = x + dx, y + dy
+                    table[sq][square(x, y)] = mask
+                    mask |= bit(x, y)
+    return table
+
+
+# Squares strictly between two squares on a common line, 0 otherwise.
+BETWEEN = _between_table()
+
+# King from/to and rook from/to squares for the K, Q, k, q castling rights,
+# the squares that must be empty and the ones the king must not cross in check.
+CASTLING_MOVES = [(square(4, 7), square(6, 7), square(7, 7), square(5, 7)),
+                  (square(4, 7), square(2, 7), square(0, 7), square(3, 7)),
+                  (square(4, 0), square(6, 0), square(7, 0), square(5, 0)),
+                  (square(4, 0), square(2, 0), square(0, 0), square(3, 0))]
+CASTLING_EMPTY = [BETWEEN[king][rook] for king, _, rook, _ in CASTLING_MOVES]
+CASTLING_SAFE = [BETWEEN[king][to] | (1 << to) for king, to, _, _ in CASTLING_MOVES]
+
+
+def rook_attacks(sq, occupied):
+    return (RANK_ATTACKS[sq][occupied & RANK_MASKS[sq]]
+            | FILE_ATTACKS[sq][occupied & FILE_MASKS[sq]])
+
+
+def bishop_attacks(sq, occupied):
+    return (DIAG_ATTACKS[sq][occupied & DIAG_MASKS[sq]]
+            | ANTI_ATTACKS[sq][occupied & ANTI_MASKS[sq]])
+
+
+def queen_attacks(sq, occupied):
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+
+class Bitboards:
+    def __init__(self):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupied = [0, 0]
+        self.all = 0
+
+    def clear(self):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupied = [0, 0]
+        self.all = 0
+
+    def load(self, board):
+        self.clear()
+        for y in range(8):
+            for x in range(8):
+                piece = board[y][x]
+                if piece is not None:
+                    self.put(square(x, y), COLOR_INDEX[piece.color], piece.kind)
+
+    def put(self, sq, color, kind):
+        mask = 1 << sq
+        self.pieces[color][kind] |= mask
+        self.occupied[color] |= mask
+        self.all |= mask
+
+    def remove(self, sq, color, kind):
+        mask = ~(1 << sq)
+        self.pieces[color][kind] &= mask
+        self.occupied[color] &= mask
+        self.all &= mask
+
+    def move(self, from_sq, to_sq, color, kind):
+        mask = (1 << from_sq) | (1 << to_sq)
+        self.pieces[color][kind] ^= mask
+        self.occupied[color] ^= mask
+        self.all ^= mask
+
+    def piece_at(self, sq):
+        mask = 1 << sq
+        if not self.all & mask:
+            return None
+        color = WHITE if self.occupied[WHITE] & mask else BLACK
+        for kind, pieces in enumerate(self.pieces[color]):
+            if pieces & mask:
+                return color, kind
+        return None
+
+    def king_square(self, color):
+        kings = self.pieces[color][KING]
+        if not kings:
+            return None
+        return (kings & -kings).bit_length() - 1
+
+    def attacks_from(self, sq, color, kind, occupied=None):
+        if occupied is None:
+            occupied = self.all
+        if kind == PAWN:
+            return PAWN_ATTACKS[color][sq]
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[sq]
+        if kind == BISHOP:
+            return bishop_attacks(sq, occupied)
+        if kind == ROOK:
+            return rook_attacks(sq, occupied)
+        if kind == QUEEN:
+            return queen_attacks(sq, occupied)
+        return KING_ATTACKS[sq]
+
+    def attackers_to(self, sq, by_color, occupied=None):
+        if occupied is None:
+            occupied = self.all
+        pieces = self.pieces[by_color]
+        queens = pieces[QUEEN]
+        return ((PAWN_ATTACKS[by_color ^ 1][sq] & pieces[PAWN])
+                | (KNIGHT_ATTACKS[sq] & pieces[KNIGHT])
+                | (KING_ATTACKS[sq] & pieces[KING])
+                | (bishop_attacks(sq, occupied) & (pieces[BISHOP] | queens))
+                | (rook_attacks(sq, occupied) & (pieces[ROOK] | queens)))
+
+    def is_attacked(self, sq, by_color):
+        return self.attackers_to(sq, by_color) != 0
+
+    def attacked_squares(self, color):
+        occupied = self.all
+        attacked = 0
+        for kind, pieces in enumerate(self.pieces[color]):
+            for sq in iter_bits(pieces):
+                attacked |= self.attacks_from(sq, color, kind, occupied)
+        return attacked
+
+    def in_check(self, color):
+        king_sq = self.king_square(color)
+        if king_sq is None:
+            return False
+        return self.is_attacked(king_sq, color ^ 1)
+
+    def legal_moves(self, us, from_mask=FULL, to_mask=FULL, castling_rights=0, en_passant=None):
+        them = us ^ 1
+        pieces = self.pieces[us]
+        own = self.occupied[us]
+        enemy = self.occupied[them]
+        occupied = self.all
+        moves = []
+        target = ~own & to_mask
+        pinned = {}
+
+        king_sq = self.king_square(us)
+        if king_sq is not None:
+            king_bit = 1 << king_sq
+            if from_mask & king_bit:
+                without_king = occupied ^ king_bit
+                for to_sq in iter_bits(KING_ATTACKS[king_sq] & target):
+                    if not self.attackers_to(to_sq, them, without_king):
+                        moves.append((king_sq, to_sq))
+
+            checkers = self.attackers_to(king_sq, them)
+            if checkers:
+                if checkers & (checkers - 1):
+                    return moves
+                target &= checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+            elif castling_rights & (0b0011 if us == WHITE else 0b1100) and from_mask & king_bit:
+                for i in ((0, 1) if us == WHITE else (2, 3)):
+                    king_from, king_to, rook_from, _ = CASTLING_MOVES[i]
+                    if (castling_rights >> i & 1 and king_sq == king_from
+                            and to_mask >> king_to & 1 and pieces[ROOK] >> rook_from & 1
+                            and not occupied & CASTLING_EMPTY[i]
+                            and not any(self.attackers_to(sq, them)
+                                        for sq in iter_bits(CASTLING_SAFE[i]))):
+                        moves.append((king_from, king_to))
+
+            # Sliders that would hit the king if our own pieces were
+            # transparent; a single own piece between them is pinned to the ray.
+            their = self.pieces[them]
+            snipers = ((rook_attacks(king_sq, enemy) & (their[ROOK] | their[QUEEN]))
+                       | (bishop_attacks(king_sq, enemy) & (their[BISHOP] | their[QUEEN])))
+            for sniper_sq in iter_bits(snipers):
+                ray = BETWEEN[king_sq][sniper_sq]
+                blockers = ray & occupied
+                if blockers & own and not blockers & (blockers - 1):
+                    pinned[blockers.bit_length() - 1] = ray | (1 << sniper_sq)
+
+        for kind in (KNIGHT, BISHOP, ROOK, QUEEN):
+            for from_sq in iter_bits(pieces[kind] & from_mask):
+                if kind == KNIGHT:
+                    attacks = KNIGHT_ATTACKS[from_sq]
+                elif kind == BISHOP:
+                    attacks = bishop_attacks(from_sq, occupied)
+                elif kind == ROOK:
+                    attacks = rook_attacks(from_sq, occupied)
+                else:
+                    attacks = queen_attacks(from_sq, occupied)
+                attacks &= target
+                if from_sq in pinned:
+                    attacks &= pinned[from_sq]
+                for to_sq in iter_bits(attacks):
+                    moves.append((from_sq, to_sq))
+
+        pawns = pieces[PAWN] & from_mask
+        if pawns:
+            empty = ~occupied & FULL
+            if us == WHITE:
+                singles = (pawns >> 8) & empty
+                doubles = ((singles & ROW_MASKS[5]) >> 8) & empty
+                back = 8
+            else:
+                singles = (pawns << 8) & empty
+                doubles = ((singles & ROW_MASKS[2]) << 8) & empty
+                back = -8
+            for to_sq in iter_bits(singles & target):
+                from_sq = to_sq + back
+                if from_sq not in pinned or pinned[from_sq] >> to_sq & 1:
+                    moves.append((from_sq, to_sq))
+            for to_sq in iter_bits(doubles & target):
+                from_sq = to_sq + 2 * back
+                if from_sq not in pinned or pinned[from_sq] >> to_sq & 1:
+                    moves.append((from_sq, to_sq))
+            pawn_attacks = PAWN_ATTACKS[us]
+            for from_sq in iter_bits(pawns):
+                attacks = pawn_attacks[from_sq] & enemy & target
+                if from_sq in pinned:
+                    attacks &= pinned[from_sq]
+                for to_sq in iter_bits(attacks):
+                    moves.append((from_sq, to_sq))
+
+            # En passant is checked by playing it out: removing two pawns from
+            # one rank can expose the king in ways the pin scan does not see.
+            if en_passant is not None and to_mask >> en_passant & 1:
+                captured_sq = en_passant + (8 if us == WHITE else -8)
+                for from_sq in iter_bits(PAWN_ATTACKS[them][en_passant] & pawns):
+                    if king_sq is not None:
+                        after = occupied ^ (1 << from_sq) ^ (1 << captured_sq) | (1 << en_passant)
+                        if self.attackers_to(king_sq, them, after) & ~(1 << captured_sq):
+                            continue
+                    moves.append((from_sq, en_passant))
+
+        return moves
@@ -0,0 +1,121 @@
+import mmap
+import os
+import random
+import struct
+
+from .bitboard import COLOR_INDEX, KING, PAWN, PAWN_ATTACKS, QUEEN, iter_bits, square
+from .polyglot_keys import RANDOM_ARRAY
+
+
+ENTRY = struct.Struct('>QHHI')
+KEY = struct.Struct('>Q')
+
+CASTLING_OFFSET = 768
+EN_PASSANT_OFFSET = 772
+TURN_OFFSET = 780
+
+
+def polyglot_key(board):
+    bitboards = board.bitboards
+    key = 0
+    for color in range(2):
+        for kind in range(6):
+            # Polyglot orders pieces black pawn, white pawn, black knight, ...
+            # and counts squares from a1, while our squares start at a8.
+            offset = 64 * (2 * kind + (color ^ 1))
+            for sq in iter_bits(bitboards.pieces[color][kind]):
+                key ^= RANDOM_ARRAY[offset + (sq ^ 56)]
+
+    for i in range(4):
+        if board.castling_rights & (1 << i):
+            key ^= RANDOM_ARRAY[CASTLING_OFFSET + i]
+
+    us = COLOR_INDEX[board.current_player]
+    if board.en_passant is not None:
+        ep_sq = square(*board.en_passant)
+        if PAWN_ATTACKS[us ^ 1][ep_sq] & bitboards.pieces[us][PAWN]:
+            key ^= RANDOM_ARRAY[EN_PASSANT_OFFSET + board.en_passant[0]]
+
+    if board.current_player == 'white':
+        key ^= RANDOM_ARRAY[TURN_OFFSET]
+    return key
+
+
+def _decode_move(move):
+    to_x, to_y = move & 7, 7 - ((move >> 3) & 7)
+    from_x, from_y = (move >> 6) & 7, 7 - ((move >> 9) & 7)
+    # Promotion pieces are numbered 1-4 from knight to queen, as our kinds are;
+    # anything above is a corrupt entry.
+    promotion = (move >> 12) & 7
+    if promotion > QUEEN:
+        return None
+    return (from_x, from_y), (to_x, to_y), promotion or None
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            # mmap refuses empty files.
+            if os.fstat(f.fileno()).st_size < ENTRY.size:
+                self.data = b''
+            else:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries = len(self.data) // ENTRY.size
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b''
+        self.entries = 0
+
+    def _lower_bound(self, key):
+        low, high = 0, self.entries
+        data = self.data
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find_entries(self, key):
+        entries = []
+        index = self._lower_bound(key)
+        while index < self.entries:
+            entry_key, move, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY.size)
+            if entry_key != key:
+                break
+            entries.append((move, weight))
+            index += 1
+        return entries
+
+    def get_moves(self, board):
+        entries = self.find_entries(polyglot_key(board))
+        if not entries:
+            return []
+        legal = set(board.generate_legal_moves())
+        moves = []
+        for move, weight in entries:
+            decoded = _decode_move(move)
+            if decoded is None:
+                continue
+            from_pos, to_pos, promotion = decoded
+            piece = board.get_piece(from_pos)
+            if piece is None:
+                continue
+            # Polyglot writes castling as the king capturing its own rook.
+            target = board.get_piece(to_pos)
+            if piece.kind == KING and target is not None and target.color == piece.color:
+                to_pos = (6 if to_pos[0] > from_pos[0] else 2, to_pos[1])
+            if (from_pos, to_pos) in legal:
+                moves.append((from_pos, to_pos, promotion, weight))
+        return moves
+
+    def choose(self, board, rng=random):
+        moves = [move for move in self.get_moves(board) if move[3] > 0]
+        if not moves:
+            return None
+        from_pos, to_pos, promotion, _ = rng.choices(moves, weights=[move[3] for move in moves])[0]
+        return from_pos, to_pos, promotion
@@ -1,124 +1,470 @@
-from .chess_pieces import Pawn, Rook, Knight, Bishop, Queen, King
-
-
-class ChessBoard:
-    def __init__(self):
-        self.board = [[None for _ in range(8)] for _ in range(8)]
-        self.setup_board()
-        self.current_player = 'white'
-        self.move_history = []
-        self.captured_pieces = {'white': [], 'black': []}
-        
-    def setup_board(self):
-        for i in range(8):
-            self.board[1][i] = Pawn('black', (i, 1))
-            self.board[6][i] = Pawn('white', (i, 6))
-            
-        self.board[0][0] = Rook('black', (0, 0))
-        self.board[0][7] = Rook('black', (7, 0))
-        self.board[7][0] = Rook('white', (0, 7))
-        self.board[7][7] = Rook('white', (7, 7))
-        
-        self.board[0][1] = Knight('black', (1, 0))
-        self.board[0][6] = Knight('black', (6, 0))
-        self.board[7][1] = Knight('white', (1, 7))
-        self.board[7][6] = Knight('white', (6, 7))
-        
-        self.board[0][2] = Bishop('black', (2, 0))
-        self.board[0][5] = Bishop('black', (5, 0))
-        self.board[7][2] = Bishop('white', (2, 7))
-        self.board[7][5] = Bishop('white', (5, 7))
-        
-        self.board[0][3] = Queen('black', (3, 0))
-        self.board[7][3] = Queen('white', (3, 7))
-        
-        self.board[0][4] = King('black', (4, 0))
-        self.board[7][4] = King('white', (4, 7))
-        
-    def get_piece(self, position):
-        x, y = position
-        return self.board[y][x]
-    
-    def move_piece(self, from_pos, to_pos):
-        from_x, from_y = from_pos
-        to_x, to_y = to_pos
-        
-        piece = self.board[from_y][from_x]
-        if piece is None:
-            return False
-            
-        if piece.color != self.current_player:
-            return False
-            
-        if to_pos not in piece.get_possible_moves(self):
-            return False
-            
-        target_piece = self.board[to_y][to_x]
-        if target_piece is not None:
-            self.captured_pieces[target_piece.color].append(target_piece)
-            
-        self.board[to_y][to_x] = piece
-        self.board[from_y][from_x] = None
-        piece.move(to_pos)
-        
-        self.move_history.append((from_pos, to_pos))
-        
-        self.current_player = 'black' if self.current_player == 'white' else 'white'
-        return True
-        
-    def is_check(self, color):
-        king_pos = None
-        for y in range(8):
-            for x in range(8):
-                piece = self.board[y][x]
-                if isinstance(piece, King) and piece.color == color:
-                    king_pos = (x, y)
-                    break
-            if king_pos is not None:
-                break
-                
-        if king_pos is None:
-            return False
-            
-        opponent_color = 'black' if color == 'white' else 'white'
-        for y in range(8):
-            for x in range(8):
-                piece = self.board[y][x]
-                if piece is not None and piece.color == opponent_color:
-                    if king_pos in piece.get_possible_moves(self):
-                        return True
-                        
-        return False
-        
-    def is_checkmate(self, color):
-        if not self.is_check(color):
-            return False
-            
-        for y in range(8):
-            for x in range(8):
-                piece = self.board[y][x]
-                if piece is not None and piece.color == color:
-                    for move in piece.get_possible_moves(self):
-                        original_piece = self.board[move[1]][move[0]]
-                        original_pos = piece.position
-                        
-                        self.board[move[1]][move[0]] = piece
-                        self.board[y][x] = None
-                        piece.position = move
-                        
-                        still_in_check = self.is_check(color)
-                        
-                        self.board[move[1]][move[0]] = original_piece
-                        self.board[y][x] = piece
-                        piece.position = original_pos
-                        
-                        if not still_in_check:
-                            return False
-                            
-        return True
-        
-    def __str__(self):
-        board_str = ""
-        for row in reversed(self.board):
-            board_str += " ".join([str(piece) if piece is not None else ".." for piece in row]) + "\n"
+from collections import namedtuple
+
+from .bitboard import (Bitboards, COLOR_INDEX, FULL, PAWN_ATTACKS, ROW_MASKS, SQUARE_POSITIONS,
+                       PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, square)
+from .chess_pieces import PIECES, PIECES_BY_KIND
+from .evaluation import PHASE_WEIGHTS, SQUARE_SCORES_EG, SQUARE_SCORES_MG, compute_tapered
+from .notation import FILES, move_to_uci, square_name, parse_square
+from .zobrist import PIECE_KEYS, CASTLING_KEYS, EN_PASSANT_KEYS, SIDE_KEY, compute_hash
+
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+CASTLING_LETTERS = 'KQkq'
+ALL_CASTLING = 0b1111
+
+# Rights that survive a move touching the square: moving the king or a rook
+# off its home square, or capturing a rook there, clears the matching bits.
+CASTLING_KEEP = [ALL_CASTLING] * 64
+CASTLING_KEEP[square(4, 7)] = 0b1100
+CASTLING_KEEP[square(7, 7)] = 0b1110
+CASTLING_KEEP[square(0, 7)] = 0b1101
+CASTLING_KEEP[square(4, 0)] = 0b0011
+CASTLING_KEEP[square(7, 0)] = 0b1011
+CASTLING_KEEP[square(0, 0)] = 0b0111
+
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+PROMOTION_ROWS = ROW_MASKS[0] | ROW_MASKS[7]
+BACK_RANK = 'rhbqkbhr'
+
+MoveUndo = namedtuple('MoveUndo', ['piece', 'from_pos', 'to_pos', 'captured', 'captured_pos',
+                                   'promotion', 'castling_rights', 'en_passant', 'halfmove_clock',
+                                   'hash', 'attack_maps', 'tapered'])
+
+FEN_SYMBOLS = {'p': 'p', 'n': 'h', 'b': 'b', 'r': 'r', 'q': 'q', 'k': 'k'}
+
+
+def validate_fen(fen):
+    # Catches what load_fen cannot take, before the board is touched; the
+    # last four fields may be left out, as load_fen allows.
+    def invalid(reason):
+        return ValueError(f"недопустимый FEN ({reason}): {fen}")
+
+    fields = fen.split()
+    if not 2 <= len(fields) <= 6:
+        raise invalid("нужно от 2 до 6 полей")
+    rows = fields[0].split('/')
+    if len(rows) != 8:
+        raise invalid("нужно 8 горизонталей")
+    kings = {'K': 0, 'k': 0}
+    for y, row in enumerate(rows):
+        width = 0
+        for char in row:
+            if char in '12345678':
+                width += int(char)
+                continue
+            if char.lower() not in FEN_SYMBOLS:
+                raise invalid(f"неизвестная фигура {char}")
+            if char in 'Pp' and y in (0, 7):
+                raise invalid("пешка на крайней горизонтали")
+            if char in kings:
+                kings[char] += 1
+            width += 1
+        if width != 8:
+            raise invalid(f"в горизонтали {8 - y} не 8 клеток")
+    if kings != {'K': 1, 'k': 1}:
+        raise invalid("у каждой стороны должен быть один король")
+    if fields[1] not in ('w', 'b'):
+        raise invalid("очередь хода w или b")
+    if len(fields) > 2 and fields[2] != '-' and (
+            any(letter not in CASTLING_LETTERS for letter in fields[2])
+            or len(set(fields[2])) != len(fields[2])):
+        raise invalid("права на рокировку")
+    if len(fields) > 3 and fields[3] != '-' and not (
+            len(fields[3]) == 2 and fields[3][0] in FILES and fields[3][1] in '36'):
+        raise invalid("поле взятия на проходе")
+    if len(fields) > 4 and not fields[4].isdigit():
+        raise invalid("счётчик полуходов")
+    if len(fields) > 5 and not fields[5].isdigit():
+        raise invalid("номер хода")
+
+
+class ChessBoard:
+    debug_checks = False
+
+    def __init__(self, fen=None):
+        self.board = [[None for _ in range(8)] for _ in range(8)]
+        self.bitboards = Bitboards()
+        self.current_player = 'white'
+        self.move_history = []
+        self.undo_stack = []
+        self.captured_pieces = {'white': [], 'black': []}
+        self.castling_rights = ALL_CASTLING
+        self.en_passant = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.hash = 0
+        # Middlegame and endgame material plus piece-square sums from White's
+        # side, and the game phase; see evaluation.compute_tapered.
+        self.mg = self.eg = self.phase = 0
+        self.king_squares = [None, None]
+        self.attack_maps = [None, None]
+        self.repetitions = {}
+        self.start_fen = START_FEN
+        self.setup_board()
+        if fen is not None:
+            self.load_fen(fen)
+        
+    def setup_board(self):
+        for x, symbol in enumerate(BACK_RANK):
+            self.board[0][x] = PIECES[symbol, 'black']
+            self.board[1][x] = PIECES['p', 'black']
+            self.board[6][x] = PIECES['p', 'white']
+            self.board[7][x] = PIECES[symbol, 'white']
+        self.rebuild()
+
+    def rebuild(self):
+        self.bitboards.load(self.board)
+        if self.en_passant is not None:
+            # The en passant square only counts, for hashing and repetition,
+            # when a pawn could actually take there.
+            us = COLOR_INDEX[self.current_player]
+            if not PAWN_ATTACKS[us ^ 1][square(*self.en_passant)] & self.bitboards.pieces[us][PAWN]:
+                self.en_passant = None
+        self.hash = self.compute_hash()
+        self.mg, self.eg, self.phase = compute_tapered(self.bitboards)
+        self.king_squares = [self.bitboards.king_square(color) for color in range(2)]
+        self.attack_maps = [None, None]
+        self.repetitions = {self.hash: 1}
+        
+    def compute_hash(self):
+        return compute_hash(self.bitboards, self.current_player == 'black',
+                            self.castling_rights, self.en_passant)
+        
+    def load_fen(self, fen):
+        validate_fen(fen)
+        fields = fen.split()
+        self.board = [[None for _ in range(8)] for _ in range(8)]
+        for y, row in enumerate(fields[0].split('/')):
+            x = 0
+            for char in row:
+                if char.isdigit():
+                    x += int(char)
+                    continue
+                color = 'white' if char.isupper() else 'black'
+                self.board[y][x] = PIECES[FEN_SYMBOLS[char.lower()], color]
+                x += 1
+                
+        self.current_player = 'white' if fields[1] == 'w' else 'black'
+        castling = fields[2] if len(fields) > 2 else '-'
+        self.castling_rights = 0
+        for i, letter in enumerate(CASTLING_LETTERS):
+            if letter in castling:
+                self.castling_rights |= 1 << i
+        self.en_passant = parse_square(fields[3]) if len(fields) > 3 else None
+        self.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        self.move_history = []
+        self.undo_stack = []
+        self.captured_pieces = {'white': [], 'black': []}
+        self.rebuild()
+        self.start_fen = self.get_fen()
+        
+    def get_fen(self):
+        rows = []
+        for row in self.board:
+            text = ''
+            empty = 0
+            for piece in row:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                letter = 'n' if piece.symbol == 'h' else piece.symbol
+                text += letter.upper() if piece.color == 'white' else letter
+            if empty:
+                text += str(empty)
+            rows.append(text)
+            
+        castling = ''.join(letter for i, letter in enumerate(CASTLING_LETTERS)
+                           if self.castling_rights & (1 << i)) or '-'
+        en_passant = square_name(self.en_passant) if self.en_passant else '-'
+        return (f"{'/'.join(rows)} {self.current_player[0]} {castling} {en_passant} "
+                f"{self.halfmove_clock} {self.fullmove_number}")
+        
+    def get_piece(self, position):
+        x, y = position
+        return self.board[y][x]
+    
+    def move_piece(self, from_pos, to_pos, promotion=None):
+        from_x, from_y = from_pos
+        to_x, to_y = to_pos
+        
+        piece = self.board[from_y][from_x]
+        if piece is None:
+            return False
+            
+        if piece.color != self.current_player:
+            return False
+            
+        if to_pos not in self.get_legal_moves(from_pos):
+            return False
+            
+        if promotion is not None and promotion not in PROMOTIONS:
+            return False
+            
+        self.make_move(from_pos, to_pos, promotion)
+        return True
+        
+    def is_promotion(self, from_pos, to_pos):
+        piece = self.board[from_pos[1]][from_pos[0]]
+        return piece is not None and piece.kind == PAWN and to_pos[1] in (0, 7)
+        
+    def make_move(self, from_pos, to_pos, promotion=None):
+        from_x, from_y = from_pos
+        to_x, to_y = to_pos
+        piece = self.board[from_y][from_x]
+        captured = self.board[to_y][to_x]
+        captured_pos = to_pos
+        color = COLOR_INDEX[piece.color]
+        kind = piece.kind
+        from_sq = square(from_x, from_y)
+        to_sq = square(to_x, to_y)
+        if kind == PAWN:
+            if captured is None and from_x != to_x:
+                captured_pos = (to_x, from_y)
+                captured = self.board[from_y][to_x]
+            if to_y in (0, 7):
+                if promotion is None:
+                    promotion = QUEEN
+                elif promotion not in PROMOTIONS:
+                    raise ValueError(f"недопустимое превращение {promotion}")
+            else:
+                promotion = None
+        else:
+            promotion = None
+        undo = MoveUndo(piece, from_pos, to_pos, captured, captured_pos, promotion,
+                        self.castling_rights, self.en_passant, self.halfmove_clock,
+                        self.hash, self.attack_maps, (self.mg, self.eg, self.phase))
+        
+        bitboards = self.bitboards
+        piece_keys = PIECE_KEYS[color]
+        key = self.hash ^ piece_keys[kind][from_sq] ^ SIDE_KEY
+        mg_scores = SQUARE_SCORES_MG[color]
+        eg_scores = SQUARE_SCORES_EG[color]
+        mg = self.mg - mg_scores[kind][from_sq]
+        eg = self.eg - eg_scores[kind][from_sq]
+        if captured is not None:
+            captured_x, captured_y = captured_pos
+            captured_sq = square(captured_x, captured_y)
+            bitboards.remove(captured_sq, color ^ 1, captured.kind)
+            self.board[captured_y][captured_x] = None
+            self.captured_pieces[captured.color].append(captured)
+            key ^= PIECE_KEYS[color ^ 1][captured.kind][captured_sq]
+            mg -= SQUARE_SCORES_MG[color ^ 1][captured.kind][captured_sq]
+            eg -= SQUARE_SCORES_EG[color ^ 1][captured.kind][captured_sq]
+            self.phase -= PHASE_WEIGHTS[captured.kind]
+            if captured.kind == KING:
+                self.king_squares[color ^ 1] = None
+        self.board[from_y][from_x] = None
+        if promotion is None:
+            bitboards.move(from_sq, to_sq, color, kind)
+            self.board[to_y][to_x] = piece
+            key ^= piece_keys[kind][to_sq]
+            mg += mg_scores[kind][to_sq]
+            eg += eg_scores[kind][to_sq]
+        else:
+            bitboards.remove(from_sq, color, PAWN)
+            bitboards.put(to_sq, color, promotion)
+            self.board[to_y][to_x] = PIECES_BY_KIND[promotion, piece.color]
+            key ^= piece_keys[promotion][to_sq]
+            mg += mg_scores[promotion][to_sq]
+            eg += eg_scores[promotion][to_sq]
+            self.phase += PHASE_WEIGHTS[promotion]
+        
+        if kind == KING:
+            self.king_squares[color] = to_sq
+            if abs(to_x - from_x) == 2:
+                rook_from, rook_to = (7, 5) if to_x > from_x else (0, 3)
+                rook = self.board[from_y][rook_from]
+                self.board[from_y][rook_from] = None
+                self.board[from_y][rook_to] = rook
+                rook_from_sq = square(rook_from, from_y)
+                rook_to_sq = square(rook_to, from_y)
+                bitboards.move(rook_from_sq, rook_to_sq, color, ROOK)
+                key ^= piece_keys[ROOK][rook_from_sq] ^ piece_keys[ROOK][rook_to_sq]
+                mg += mg_scores[ROOK][rook_to_sq] - mg_scores[ROOK][rook_from_sq]
+                eg += eg_scores[ROOK][rook_to_sq] - eg_scores[ROOK][rook_from_sq]
+        
+        castling_rights = self.castling_rights & CASTLING_KEEP[from_sq] & CASTLING_KEEP[to_sq]
+        if castling_rights != self.castling_rights:
+            key ^= CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[castling_rights]
+            self.castling_rights = castling_rights
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant[0]]
+            self.en_passant = None
+        self.halfmove_clock += 1
+        if kind == PAWN:
+            self.halfmove_clock = 0
+            if abs(to_y - from_y) == 2:
+                middle = (from_x, (from_y + to_y) // 2)
+                if PAWN_ATTACKS[color][square(*middle)] & bitboards.pieces[color ^ 1][PAWN]:
+                    self.en_passant = middle
+                    key ^= EN_PASSANT_KEYS[from_x]
+        elif captured is not None:
+            self.halfmove_clock = 0
+        if color:
+            self.fullmove_number += 1
+        self.current_player = 'black' if self.current_player == 'white' else 'white'
+        self.hash = key
+        self.mg = mg
+        self.eg = eg
+        self.attack_maps = [None, None]
+        self.repetitions[key] = self.repetitions.get(key, 0) + 1
+        
+        self.move_history.append((from_pos, to_pos, promotion))
+        self.undo_stack.append(undo)
+        if self.debug_checks:
+            assert self.hash == self.compute_hash(), 'incremental hash diverged'
+            tapered = (self.mg, self.eg, self.phase)
+            assert tapered == compute_tapered(self.bitboards), 'incremental evaluation diverged'
+        return undo
+        
+    def unmake_move(self):
+        if not self.undo_stack:
+            return None
+        undo = self.undo_stack.pop()
+        self.move_history.pop()
+        count = self.repetitions[self.hash] - 1
+        if count:
+            self.repetitions[self.hash] = count
+        else:
+            del self.repetitions[self.hash]
+        from_x, from_y = undo.from_pos
+        to_x, to_y = undo.to_pos
+        piece = undo.piece
+        captured = undo.captured
+        color = COLOR_INDEX[piece.color]
+        from_sq = square(from_x, from_y)
+        to_sq = square(to_x, to_y)
+        
+        self.current_player = 'black' if self.current_player == 'white' else 'white'
+        if color:
+            self.fullmove_number -= 1
+        self.castling_rights = undo.castling_rights
+        self.en_passant = undo.en_passant
+        self.halfmove_clock = undo.halfmove_clock
+        self.hash = undo.hash
+        self.mg, self.eg, self.phase = undo.tapered
+        self.attack_maps = undo.attack_maps
+        
+        bitboards = self.bitboards
+        if undo.promotion is None:
+            bitboards.move(to_sq, from_sq, color, piece.kind)
+        else:
+            bitboards.remove(to_sq, color, undo.promotion)
+            bitboards.put(from_sq, color, PAWN)
+        self.board[to_y][to_x] = None
+        self.board[from_y][from_x] = piece
+        if captured is not None:
+            captured_x, captured_y = undo.captured_pos
+            self.board[captured_y][captured_x] = captured
+            bitboards.put(square(captured_x, captured_y), color ^ 1, captured.kind)
+            self.captured_pieces[captured.color].pop()
+            if captured.kind == KING:
+                self.king_squares[color ^ 1] = square(captured_x, captured_y)
+        if piece.kind == KING:
+            self.king_squares[color] = from_sq
+            if abs(to_x - from_x) == 2:
+                rook_from, rook_to = (7, 5) if to_x > from_x else (0, 3)
+                rook = self.board[from_y][rook_to]
+                self.board[from_y][rook_to] = None
+                self.board[from_y][rook_from] = rook
+                bitboards.move(square(rook_to, from_y), square(rook_from, from_y), color, ROOK)
+        if self.debug_checks:
+            assert self.hash == self.compute_hash(), 'incremental hash diverged'
+            tapered = (self.mg, self.eg, self.phase)
+            assert tapered == compute_tapered(self.bitboards), 'incremental evaluation diverged'
+        return undo
+        
+    def legal_moves(self, from_mask=FULL, to_mask=FULL, color=None):
+        if color is None or color == self.current_player:
+            en_passant = square(*self.en_passant) if self.en_passant is not None else None
+            return self.bitboards.legal_moves(COLOR_INDEX[self.current_player], from_mask, to_mask,
+                                              self.castling_rights, en_passant)
+        return self.bitboards.legal_moves(COLOR_INDEX[color], from_mask, to_mask,
+                                          self.castling_rights)
+        
+    def generate_legal_moves(self, color=None):
+        return [(SQUARE_POSITIONS[from_sq], SQUARE_POSITIONS[to_sq])
+                for from_sq, to_sq in self.legal_moves(color=color)]
+        
+    def get_legal_moves(self, position):
+        x, y = position
+        piece = self.board[y][x]
+        if piece is None:
+            return []
+        moves = self.legal_moves(1 << square(x, y), color=piece.color)
+        return [SQUARE_POSITIONS[to_sq] for _, to_sq in moves]
+        
+    def perft(self, depth):
+        if depth == 0:
+            return 1
+        moves = self.legal_moves()
+        pawns = self.bitboards.pieces[COLOR_INDEX[self.current_player]][PAWN]
+        if depth == 1:
+            promotions = sum(1 for from_sq, to_sq in moves
+                             if pawns >> from_sq & 1 and PROMOTION_ROWS >> to_sq & 1)
+            return len(moves) + 3 * promotions
+        nodes = 0
+        for from_sq, to_sq in moves:
+            from_pos, to_pos = SQUARE_POSITIONS[from_sq], SQUARE_POSITIONS[to_sq]
+            promoting = pawns >> from_sq & 1 and PROMOTION_ROWS >> to_sq & 1
+            for promotion in (PROMOTIONS if promoting else (None,)):
+                self.make_move(from_pos, to_pos, promotion)
+                nodes += self.perft(depth - 1)
+                self.unmake_move()
+        return nodes
+        
+    def divide(self, depth):
+        results = {}
+        for from_pos, to_pos in self.generate_legal_moves():
+            for promotion in (PROMOTIONS if self.is_promotion(from_pos, to_pos) else (None,)):
+                self.make_move(from_pos, to_pos, promotion)
+                results[move_to_uci(from_pos, to_pos, promotion)] = self.perft(depth - 1)
+                self.unmake_move()
+        return results
+        
+    def attacked_squares(self, color):
+        index = COLOR_INDEX[color]
+        attacks = self.attack_maps[index]
+        if attacks is None:
+            attacks = self.attack_maps[index] = self.bitboards.attacked_squares(index)
+        return attacks
+        
+    def is_check(self, color):
+        own = COLOR_INDEX[color]
+        king_sq = self.king_squares[own]
+        if king_sq is None:
+            return False
+        attacks = self.attack_maps[own ^ 1]
+        if attacks is None:
+            attacks = self.attack_maps[own ^ 1] = self.bitboards.attacked_squares(own ^ 1)
+        return attacks >> king_sq & 1 == 1
+        
+    def has_legal_moves(self, color):
+        return bool(self.legal_moves(color=color))
+        
+    def is_checkmate(self, color):
+        return self.is_check(color) and not self.has_legal_moves(color)
+        
+    def is_stalemate(self, color):
+        return not self.is_check(color) and not self.has_legal_moves(color)
+        
+    def is_fifty_move_draw(self):
+        return self.halfmove_clock >= 100
+        
+    def is_threefold_repetition(self):
+        return self.repetitions.get(self.hash, 0) >= 3
+        
+    def is_draw(self):
+        return (self.is_fifty_move_draw() or self.is_threefold_repetition()
+                or self.is_stalemate(self.current_player))
+        
+    def __str__(self):
+        board_str = ""
+        for row in reversed(self.board):
+            board_str += " ".join([str(piece) if piece is not None else ".." for piece in row]) + "\n"
         return board_str
\ No newline at end of file
@@ -0,0 +1,255 @@
+import time
+
+from .bitboard import COLOR_INDEX, SQUARE_POSITIONS, popcount
+from .evaluation import evaluate_tapered
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+
+MATE_SCORE = 100000
+INFINITY = 1000000
+
+MATE_BOUND = MATE_SCORE - 1000
+
+HASH_MOVE_BONUS = 2000000
+CAPTURE_BONUS = 1000000
+KILLER_BONUS = (900000, 800000)
+HISTORY_LIMIT = 700000
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def evaluate(board):
+    score = evaluate_tapered(board)
+    return score if board.current_player == 'white' else -score
+
+
+def _tablebase_score(value, ply):
+    if value > 0:
+        return MATE_SCORE - ply - value
+    if value < 0:
+        return -MATE_SCORE + ply - value - 1
+    return 0
+
+
+def _score_to_table(score, ply):
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class Engine:
+    def __init__(self, time_limit=1.0, max_depth=32, hash_mb=16, stop_event=None, tablebases=None):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = TranspositionTable(hash_mb)
+        self.stop_event = stop_event
+        self.tablebases = tablebases
+        self.tablebase_hits = 0
+        self.nodes = 0
+        self.deadline = None
+        self.killers = []
+        self.history = []
+        self.partial = None
+
+    def search(self, board, time_limit=None, max_depth=None, on_iteration=None):
+        if time_limit is None:
+            time_limit = self.time_limit
+        max_depth = max_depth or self.max_depth
+        start = time.perf_counter()
+        self.deadline = start + time_limit if time_limit else None
+        self.nodes = 0
+        self.tablebase_hits = 0
+        self.killers = [[None, None] for _ in range(max_depth + 64)]
+        self.history = [[[0] * 64 for _ in range(64)] for _ in range(2)]
+        self.table.reset_stats()
+
+        result = {'move': None, 'score': 0, 'depth': 0, 'nodes': 0, 'seconds': 0.0, 'nps': 0,
+                  'tbhits': 0}
+        us = COLOR_INDEX[board.current_player]
+        root_moves = self._order_moves(board, board.legal_moves(), 0, us)
+        if not root_moves:
+            return result
+        result['move'] = root_moves[0]
+        root_undo = len(board.undo_stack)
+
+        for depth in range(1, max_depth + 1):
+            self.partial = None
+            try:
+                score, move = self._search_root(board, root_moves, depth)
+            except SearchTimeout:
+                while len(board.undo_stack) > root_undo:
+                    board.unmake_move()
+                if self.partial is not None:
+                    result['move'], result['score'] = self.partial
+                break
+
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            elapsed = time.perf_counter() - start
+            result.update({
+                'move': move,
+                'score': score,
+                'depth': depth,
+                'nodes': self.nodes,
+                'seconds': elapsed,
+                'nps': int(self.nodes / elapsed) if elapsed > 0 else 0,
+                'tbhits': self.tablebase_hits,
+            })
+            if on_iteration is not None:
+                on_iteration(self._public(result))
+            if abs(score) >= MATE_SCORE - depth:
+                break
+
+        elapsed = time.perf_counter() - start
+        result['nodes'] = self.nodes
+        result['seconds'] = elapsed
+        result['nps'] = int(self.nodes / elapsed) if elapsed > 0 else 0
+        result['tbhits'] = self.tablebase_hits
+        result['table'] = self.table.get_stats()
+        return self._public(result)
+
+    def _public(self, result):
+        public = dict(result)
+        from_sq, to_sq = result['move']
+        public['move'] = (SQUARE_POSITIONS[from_sq], SQUARE_POSITIONS[to_sq])
+        return public
+
+    def _check_time(self):
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
+
+    def _search_root(self, board, moves, depth):
+        alpha, beta = -INFINITY, INFINITY
+        best_move = moves[0]
+        for move in moves:
+            board.make_move(SQUARE_POSITIONS[move[0]], SQUARE_POSITIONS[move[1]])
+            score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            board.unmake_move()
+            if score > alpha:
+                alpha = score
+                best_move = move
+                self.partial = (move, score)
+        return alpha, best_move
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        tablebases = self.tablebases
+        if tablebases is not None and popcount(board.bitboards.all) <= tablebases.max_pieces:
+            value = tablebases.probe(board)
+            if value is not None:
+                self.tablebase_hits += 1
+                return _tablebase_score(value, ply)
+        # Inside the tree a single repetition is scored as the draw it can be forced into.
+        if board.halfmove_clock >= 100 or board.repetitions[board.hash] > 1:
+            return 0
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply)
+
+        key = board.hash
+        hash_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            entry_depth, entry_score, bound, hash_move = entry
+            if entry_depth >= depth:
+                entry_score = _score_from_table(entry_score, ply)
+                if (bound == EXACT or (bound == LOWER and entry_score >= beta)
+                        or (bound == UPPER and entry_score <= alpha)):
+                    return entry_score
+
+        us = COLOR_INDEX[board.current_player]
+        moves = board.legal_moves()
+        if not moves:
+            return -MATE_SCORE + ply if board.bitboards.in_check(us) else 0
+
+        enemy = board.bitboards.occupied[us ^ 1]
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = None
+        for move in self._order_moves(board, moves, ply, us, hash_move):
+            from_sq, to_sq = move
+            board.make_move(SQUARE_POSITIONS[from_sq], SQUARE_POSITIONS[to_sq])
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if score > best:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not enemy >> to_sq & 1:
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    self.history[us][from_sq][to_sq] += depth * depth
+                break
+
+        if best <= original_alpha:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(key, depth, _score_to_table(best, ply), bound, best_move)
+        return best
+
+    def _quiescence(self, board, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        stand_pat = evaluate(board)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        us = COLOR_INDEX[board.current_player]
+        captures = board.legal_moves(to_mask=board.bitboards.occupied[us ^ 1])
+        for move in self._order_moves(board, captures, ply, us):
+            board.make_move(SQUARE_POSITIONS[move[0]], SQUARE_POSITIONS[move[1]])
+            score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _order_moves(self, board, moves, ply, us, hash_move=None):
+        rows = board.board
+        killers = self.killers[ply]
+        history = self.history[us]
+        scored = []
+        for move in moves:
+            from_sq, to_sq = move
+            victim = rows[to_sq >> 3][to_sq & 7]
+            if move == hash_move:
+                score = HASH_MOVE_BONUS
+            elif victim is not None:
+                attacker = rows[from_sq >> 3][from_sq & 7]
+                score = CAPTURE_BONUS + (victim.kind + 1) * 10 - attacker.kind
+            elif move == killers[0]:
+                score = KILLER_BONUS[0]
+            elif move == killers[1]:
+                score = KILLER_BONUS[1]
+            else:
+                score = min(history[from_sq][to_sq], HISTORY_LIMIT)
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
@@ -0,0 +1,279 @@
+from .bitboard import (COLUMN_MASKS, KNIGHT_ATTACKS, WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK,
+                       QUEEN, KING, bishop_attacks, iter_bits, popcount, rook_attacks)
+from .chess_pieces import PIECE_CLASSES
+
+
+PIECE_VALUES = [0] * 6
+for _piece_class in PIECE_CLASSES.values():
+    PIECE_VALUES[_piece_class.kind] = _piece_class.value * 100
+# The king is never traded, its 100 pawns would only swamp the other terms.
+PIECE_VALUES[KING] = 0
+
+# Piece-square tables from White's side, first row is the eighth rank, so a
+# white piece on square sq reads PST[kind][sq] and a black one sq ^ 56.
+PST = [
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     10, 10, 20, 30, 30, 20, 10, 10,
+     5, 5, 10, 25, 25, 10, 5, 5,
+     0, 0, 0, 20, 20, 0, 0, 0,
+     5, -5, -10, 0, 0, -10, -5, 5,
+     5, 10, 10, -20, -20, 10, 10, 5,
+     0, 0, 0, 0, 0, 0, 0, 0],
+    [-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20, 0, 0, 0, 0, -20, -40,
+     -30, 0, 10, 15, 15, 10, 0, -30,
+     -30, 5, 15, 20, 20, 15, 5, -30,
+     -30, 0, 15, 20, 20, 15, 0, -30,
+     -30, 5, 10, 15, 15, 10, 5, -30,
+     -40, -20, 0, 5, 5, 0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50],
+    [-20, -10, -10, -10, -10, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 10, 10, 5, 0, -10,
+     -10, 5, 5, 10, 10, 5, 5, -10,
+     -10, 0, 10, 10, 10, 10, 0, -10,
+     -10, 10, 10, 10, 10, 10, 10, -10,
+     -10, 5, 0, 0, 0, 0, 5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20],
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     5, 10, 10, 10, 10, 10, 10, 5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     0, 0, 0, 5, 5, 0, 0, 0],
+    [-20, -10, -10, -5, -5, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 5, 5, 5, 0, -10,
+     -5, 0, 5, 5, 5, 5, 0, -5,
+     0, 0, 5, 5, 5, 5, 0, -5,
+     -10, 5, 5, 5, 5, 5, 0, -10,
+     -10, 0, 5, 0, 0, 0, 0, -10,
+     -20, -10, -10, -5, -5, -10, -10, -20],
+    [-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+     20, 20, 0, 0, 0, 0, 20, 20,
+     20, 30, 10, 0, 0, 10, 30, 20],
+]
+
+# Centipawns per square a piece attacks that is not taken by its own side.
+MOBILITY_WEIGHTS = [0, 4, 5, 2, 1, 0]
+DOUBLED_PAWN = -10
+ISOLATED_PAWN = -15
+# By the pawn's rank counted from its own side, first rank first.
+PASSED_PAWN = [0, 5, 10, 20, 35, 60, 100, 0]
+
+
+def _slider_attacks(sq, kind, occupied):
+    if kind == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if kind == ROOK:
+        return rook_attacks(sq, occupied)
+    return bishop_attacks(sq, occupied) | rook_attacks(sq, occupied)
+
+
+def _pawn_structure(own, their, color):
+    score = 0
+    for x in range(8):
+        count = popcount(own & COLUMN_MASKS[x])
+        if count > 1:
+            score += DOUBLED_PAWN * (count - 1)
+        if count:
+            neighbours = (COLUMN_MASKS[x - 1] if x > 0 else 0) | (COLUMN_MASKS[x + 1] if x < 7 else 0)
+            if not own & neighbours:
+                score += ISOLATED_PAWN * count
+    for sq in iter_bits(own):
+        x, y = sq & 7, sq >> 3
+        files = COLUMN_MASKS[x] | (COLUMN_MASKS[x - 1] if x > 0 else 0) | (COLUMN_MASKS[x + 1] if x < 7 else 0)
+        # Squares in front of the pawn: lower rows for White, higher for Black.
+        ahead = ((1 << (8 * y)) - 1) if color == WHITE else ~((1 << (8 * (y + 1))) - 1)
+        if not their & files & ahead:
+            score += PASSED_PAWN[7 - y if color == WHITE else y]
+    return score
+
+
+def evaluate_terms(board):
+    # The scalar reference: every term from White's side.
+    bitboards = board.bitboards
+    pieces = bitboards.pieces
+    occupied = bitboards.all
+    terms = {'material': 0, 'pst': 0, 'mobility': 0, 'pawns': 0}
+    for color, sign in ((WHITE, 1), (BLACK, -1)):
+        flip = 0 if color == WHITE else 56
+        own = bitboards.occupied[color]
+        for kind in range(6):
+            mask = pieces[color][kind]
+            terms['material'] += sign * PIECE_VALUES[kind] * popcount(mask)
+            table = PST[kind]
+            for sq in iter_bits(mask):
+                terms['pst'] += sign * table[sq ^ flip]
+                if kind == KNIGHT:
+                    attacks = KNIGHT_ATTACKS[sq]
+                elif kind in (BISHOP, ROOK, QUEEN):
+                    attacks = _slider_attacks(sq, kind, occupied)
+                else:
+                    continue
+                terms['mobility'] += sign * MOBILITY_WEIGHTS[kind] * popcount(attacks & ~own)
+        terms['pawns'] += sign * _pawn_structure(pieces[color][PAWN], pieces[color ^ 1][PAWN], color)
+    return terms
+
+
+def evaluate_position(board):
+    return sum(evaluate_terms(board).values())
+
+
+# Tapered evaluation, the one the engine searches with: material plus
+# piece-square tables, one set for the middlegame and one for the endgame
+# (PeSTO's values), blended by how much non-pawn material is left.
+# ChessBoard keeps both sums up to date move by move, the way it keeps its
+# hash, so a leaf costs a couple of lookups.
+MATERIAL_MG = [82, 337, 365, 477, 1025, 0]
+MATERIAL_EG = [94, 281, 297, 512, 936, 0]
+PHASE_WEIGHTS = [0, 1, 1, 2, 4, 0]
+PHASE_TOTAL = 24
+
+PST_MG = [
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     98, 134, 61, 95, 68, 126, 34, -11,
+     -6, 7, 26, 31, 65, 56, 25, -20,
+     -14, 13, 6, 21, 23, 12, 17, -23,
+     -27, -2, -5, 12, 17, 6, 10, -25,
+     -26, -4, -4, -10, 3, 3, 33, -12,
+     -35, -1, -20, -23, -15, 24, 38, -22,
+     0, 0, 0, 0, 0, 0, 0, 0],
+    [-167, -89, -34, -49, 61, -97, -15, -107,
+     -73, -41, 72, 36, 23, 62, 7, -17,
+     -47, 60, 37, 65, 84, 129, 73, 44,
+     -9, 17, 19, 53, 37, 69, 18, 22,
+     -13, 4, 16, 13, 28, 19, 21, -8,
+     -23, -9, 12, 10, 19, 17, 25, -16,
+     -29, -53, -12, -3, -1, 18, -14, -19,
+     -105, -21, -58, -33, -17, -28, -19, -23],
+    [-29, 4, -82, -37, -25, -42, 7, -8,
+     -26, 16, -18, -13, 30, 59, 18, -47,
+     -16, 37, 43, 40, 35, 50, 37, -2,
+     -4, 5, 19, 50, 37, 37, 7, -2,
+     -6, 13, 13, 26, 34, 12, 10, 4,
+     0, 15, 15, 15, 14, 27, 18, 10,
+     4, 15, 16, 0, 7, 21, 33, 1,
+     -33, -3, -14, -21, -13, -12, -39, -21],
+    [32, 42, 32, 51, 63, 9, 31, 43,
+     27, 32, 58, 62, 80, 67, 26, 44,
+     -5, 19, 26, 36, 17, 45, 61, 16,
+     -24, -11, 7, 26, 24, 35, -8, -20,
+     -36, -26, -12, -1, 9, -7, 6, -23,
+     -45, -25, -16, -17, 3, 0, -5, -33,
+     -44, -16, -20, -9, -1, 11, -6, -71,
+     -19, -13, 1, 17, 16, 7, -37, -26],
+    [-28, 0, 29, 12, 59, 44, 43, 45,
+     -24, -39, -5, 1, -16, 57, 28, 54,
+     -13, -17, 7, 8, 29, 56, 47, 57,
+     -27, -27, -16, -16, -1, 17, -2, 1,
+     -9, -26, -9, -10, -2, -4, 3, -3,
+     -14, 2, -11, -2, -5, 2, 14, 5,
+     -35, -8, 11, 2, 8, 15, -3, 1,
+     -1, -18, -9, 10, -15, -25, -31, -50],
+    [-65, 23, 16, -15, -56, -34, 2, 13,
+     29, -1, -20, -7, -8, -4, -38, -29,
+     -9, 24, 2, -16, -20, 6, 22, -22,
+     -17, -20, -12, -27, -30, -25, -14, -36,
+     -49, -1, -27, -39, -46, -44, -33, -51,
+     -14, -14, -22, -46, -44, -30, -15, -27,
+     1, 7, -8, -64, -43, -16, 9, 8,
+     -15, 36, 12, -54, 8, -28, 24, 14],
+]
+
+PST_EG = [
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     178, 173, 158, 134, 147, 132, 165, 187,
+     94, 100, 85, 67, 56, 53, 82, 84,
+     32, 24, 13, 5, -2, 4, 17, 17,
+     13, 9, -3, -7, -7, -8, 3, -1,
+     4, 7, -6, 1, 0, -5, -1, -8,
+     13, 8, 8, 10, 13, 0, 2, -7,
+     0, 0, 0, 0, 0, 0, 0, 0],
+    [-58, -38, -13, -28, -31, -27, -63, -99,
+     -25, -8, -25, -2, -9, -25, -24, -52,
+     -24, -20, 10, 9, -1, -9, -19, -41,
+     -17, 3, 22, 22, 22, 11, 8, -18,
+     -18, -6, 16, 25, 16, 17, 4, -18,
+     -23, -3, -1, 15, 10, -3, -20, -22,
+     -42, -20, -10, -5, -2, -20, -23, -44,
+     -29, -51, -23, -15, -22, -18, -50, -64],
+    [-14, -21, -11, -8, -7, -9, -17, -24,
+     -8, -4, 7, -12, -3, -13, -4, -14,
+     2, -8, 0, -1, -2, 6, 0, 4,
+     -3, 9, 12, 9, 14, 10, 3, 2,
+     -6, 3, 13, 19, 7, 10, -3, -9,
+     -12, -3, 8, 10, 13, 3, -7, -15,
+     -14, -18, -7, -1, 4, -9, -15, -27,
+     -23, -9, -23, -5, -9, -16, -5, -17],
+    [13, 10, 18, 15, 12, 12, 8, 5,
+     11, 13, 13, 11, -3, 3, 8, 3,
+     7, 7, 7, 5, 4, -3, -5, -3,
+     4, 3, 13, 1, 2, 1, -1, 2,
+     3, 5, 8, 4, -5, -6, -8, -11,
+     -4, 0, -5, -1, -7, -12, -8, -16,
+     -6, -6, 0, 2, -9, -9, -11, -3,
+     -9, 2, 3, -1, -5, -13, 4, -20],
+    [-9, 22, 22, 27, 27, 19, 10, 20,
+     -17, 20, 32, 41, 58, 25, 30, 0,
+     -20, 6, 9, 49, 47, 35, 19, 9,
+     3, 22, 24, 45, 57, 40, 57, 36,
+     -18, 28, 19, 47, 31, 34, 39, 23,
+     -16, -27, 15, 6, 9, 17, 10, 5,
+     -22, -23, -30, -16, -16, -23, -36, -32,
+     -33, -28, -22, -43, -5, -32, -20, -41],
+    [-74, -35, -18, -18, -11, 15, 4, -17,
+     -12, 17, 14, 17, 17, 38, 23, 11,
+     10, 17, 23, 15, 20, 45, 44, 13,
+     -8, 22, 24, 27, 26, 33, 26, 3,
+     -18, -4, 21, 24, 27, 23, 9, -11,
+     -19, -3, 11, 21, 23, 16, 7, -9,
+     -27, -11, 4, 13, 14, 4, -5, -17,
+     -53, -34, -21, -11, -28, -14, -24, -43],
+]
+
+
+def _square_scores(material, tables):
+    # [color][kind][sq]: material plus table entry, signed from White's side.
+    return [[[sign * (material[kind] + tables[kind][sq ^ flip]) for sq in range(64)]
+             for kind in range(6)]
+            for sign, flip in ((1, 0), (-1, 56))]
+
+
+SQUARE_SCORES_MG = _square_scores(MATERIAL_MG, PST_MG)
+SQUARE_SCORES_EG = _square_scores(MATERIAL_EG, PST_EG)
+
+
+def compute_tapered(bitboards):
+    # The full recompute of what ChessBoard tracks move by move: the
+    # middlegame and endgame sums and the phase, from the bitboards alone.
+    mg = eg = phase = 0
+    for color in range(2):
+        for kind in range(6):
+            mask = bitboards.pieces[color][kind]
+            mg_scores = SQUARE_SCORES_MG[color][kind]
+            eg_scores = SQUARE_SCORES_EG[color][kind]
+            for sq in iter_bits(mask):
+                mg += mg_scores[sq]
+                eg += eg_scores[sq]
+            phase += PHASE_WEIGHTS[kind] * popcount(mask)
+    return mg, eg, phase
+
+
+def tapered_score(mg, eg, phase):
+    # Promotions can push the phase past the opening total.
+    phase = min(phase, PHASE_TOTAL)
+    return (mg * phase + eg * (PHASE_TOTAL - phase)) // PHASE_TOTAL
+
+
+def evaluate_tapered(board):
+    # White's side, O(1) from the board's running sums.
+    return tapered_score(board.mg, board.eg, board.phase)
@@ -1,174 +1,258 @@
-import json
-import os
-from datetime import datetime
-from .chess_board import ChessBoard
-from .chess_pieces import Pawn, Rook, Knight, Bishop, Queen, King
-
-
-class ChessGame:
-    def __init__(self):
-        self.board = ChessBoard()
-        self.selected_piece = None
-        self.possible_moves = []
-        self.game_over = False
-        self.winner = None
-        
-    def select_piece(self, position):
-        x, y = position
-        if not (0 <= x < 8 and 0 <= y < 8):
-            return False
-            
-        piece = self.board.get_piece(position)
-        if piece is not None and piece.color == self.board.current_player:
-            self.selected_piece = position
-            self.possible_moves = piece.get_possible_moves(self.board)
-            return True
-        return False
-        
-    def move_selected_piece(self, to_position):
-        if self.selected_piece is None:
-            return False
-            
-        success = self.board.move_piece(self.selected_piece, to_position)
-        if success:
-            self.selected_piece = None
-            self.possible_moves = []
-            
-            if self.board.is_checkmate('white'):
-                self.game_over = True
-                self.winner = 'black'
-            elif self.board.is_checkmate('black'):
-                self.game_over = True
-                self.winner = 'white'
-                
-            return True
-        return False
-        
-    def get_game_state(self):
-        return {
-            'board': self.board,
-            'current_player': self.board.current_player,
-            'selected_piece': self.selected_piece,
-            'possible_moves': self.possible_moves,
-            'game_over': self.game_over,
-            'winner': self.winner,
-            'captured_white': self.board.captured_pieces['white'],
-            'captured_black': self.board.captured_pieces['black']
-        }
-
-    def save_game(self, slot=1):
-        save_data = {
-            'metadata': {
-                'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'current_player': self.board.current_player,
-                'game_over': self.game_over,
-                'winner': self.winner
-            },
-            'board': self._get_board_state(),
-            'captured': {
-                'white': [str(p) for p in self.board.captured_pieces['white']],
-                'black': [str(p) for p in self.board.captured_pieces['black']]
-            },
-            'history': self.board.move_history,
-            'game_state': {
-                'selected_piece': self.selected_piece,
-                'possible_moves': self.possible_moves
-            }
-        }
-        
-        os.makedirs('saves', exist_ok=True)
-        with open(f'saves/save_{slot}.json', 'w', encoding='utf-8') as f:
-            json.dump(save_data, f, ensure_ascii=False, indent=2)
-        return True
-    
-    def _get_board_state(self):
-        board_state = []
-        for y in range(8):
-            row = []
-            for x in range(8):
-                piece = self.board.board[y][x]
-                if piece:
-                    row.append({
-                        'type': piece.get_type(),
-                        'color': piece.color,
-                        'position': (x, y),
-                        'has_moved': piece.has_moved
-                    })
-                else:
-                    row.append(None)
-            board_state.append(row)
-        return board_state
-    
-    def load_game(self, slot=1):
-        try:
-            with open(f'saves/save_{slot}.json', 'r', encoding='utf-8') as f:
-                save_data = json.load(f)
-            
-            self.__init__()
-            
-            for y in range(8):
-                for x in range(8):
-                    piece_data = save_data['board'][y][x]
-                    if piece_data:
-                        self._restore_piece(piece_data)
-            
-            for color in ['white', 'black']:
-                for piece_str in save_data['captured'][color]:
-                    self._restore_captured_piece(piece_str, color)
-            
-            self.board.current_player = save_data['metadata']['current_player']
-            self.board.move_history = save_data['history']
-            self.game_over = save_data['metadata']['game_over']
-            self.winner = save_data['metadata']['winner']
-            self.selected_piece = save_data['game_state']['selected_piece']
-            self.possible_moves = save_data['game_state']['possible_moves']
-            
-            return True
-        except Exception as e:
-            print(f"Ошибка загрузки: {e}")
-            return False
-    
-    def _restore_piece(self, piece_data):
-        x, y = piece_data['position']
-        color = piece_data['color']
-        piece_type = piece_data['type']
-        
-        if piece_type == 'p': piece = Pawn(color, (x, y))
-        elif piece_type == 'r': piece = Rook(color, (x, y))
-        elif piece_type == 'h': piece = Knight(color, (x, y))
-        elif piece_type == 'b': piece = Bishop(color, (x, y))
-        elif piece_type == 'q': piece = Queen(color, (x, y))
-        elif piece_type == 'k': piece = King(color, (x, y))
-        
-        piece.has_moved = piece_data['has_moved']
-        self.board.board[y][x] = piece
-    
-    def _restore_captured_piece(self, piece_str, by_color):
-        color = 'white' if piece_str[0] == 'w' else 'black'
-        piece_type = piece_str[1].lower()
-        
-        if piece_type == 'p': piece = Pawn(color, (0, 0))
-        elif piece_type == 'r': piece = Rook(color, (0, 0))
-        elif piece_type == 'h': piece = Knight(color, (0, 0))
-        elif piece_type == 'b': piece = Bishop(color, (0, 0))
-        elif piece_type == 'q': piece = Queen(color, (0, 0))
-        elif piece_type == 'k': piece = King(color, (0, 0))
-        
-        self.board.captured_pieces[by_color].append(piece)
-    
-    def get_save_slots(self):
-        slots = []
-        for i in range(1, 6):
-            slot_info = {'slot': i, 'exists': False}
-            try:
-                with open(f'saves/save_{i}.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    slot_info.update({
-                        'exists': True,
-                        'date': data['metadata']['date'],
-                        'player': data['metadata']['current_player']
-                    })
-            except:
-                pass
-            slots.append(slot_info)
-        return slots
\ No newline at end of file
+import json
+import os
+from .bitboard import SQUARE_POSITIONS, iter_bits, popcount, square
+from .book import OpeningBook
+from .chess_board import PROMOTIONS, ChessBoard
+from .chess_pieces import PIECES
+from .engine import Engine
+from .move_cache import LegalMoveCache
+from .notation import move_to_uci
+from .save_file import append_moves, read_save, write_save
+from .save_slots import SaveSlotIndex, legacy_slot_path, slot_path
+from .tablebase import TABLEBASE_DIR, Tablebases, is_dead_draw, material
+
+
+SAVE_DIR = 'saves'
+save_index = SaveSlotIndex(SAVE_DIR)
+
+BOOK_PATH = os.path.join('assets', 'book.bin')
+_books = {}
+
+tablebases = Tablebases(TABLEBASE_DIR)
+
+# (king x, rook x, rank y) in the K, Q, k, q order of the castling flags.
+LEGACY_CASTLING = [(4, 7, 7), (4, 0, 7), (4, 7, 0), (4, 0, 0)]
+
+
+def get_book(path):
+    if path not in _books:
+        _books[path] = OpeningBook(path) if os.path.exists(path) else None
+    return _books[path]
+
+
+class ChessGame:
+    def __init__(self, ai_color=None, ai_time=1.0, book_path=BOOK_PATH):
+        self.board = ChessBoard()
+        self.selected_piece = None
+        self.possible_moves = []
+        self.possible_targets = 0
+        self.move_cache = LegalMoveCache()
+        self.game_over = False
+        self.winner = None
+        # (winning color, plies to mate) once the tablebases know the result.
+        self.tablebase_result = None
+        self.ai_color = ai_color
+        self.ai_time = ai_time
+        self.book_path = book_path
+        self.engine = None
+        self.last_search = None
+        self.saved_slot = None
+        self.saved_plies = 0
+        
+    def select_piece(self, position):
+        x, y = position
+        if not (0 <= x < 8 and 0 <= y < 8):
+            return False
+            
+        piece = self.board.get_piece(position)
+        if piece is not None and piece.color == self.board.current_player:
+            self.selected_piece = position
+            self.possible_targets = self.move_cache.get(self.board)[square(x, y)]
+            self.possible_moves = [SQUARE_POSITIONS[sq] for sq in iter_bits(self.possible_targets)]
+            return True
+        return False
+        
+    def can_move_to(self, position):
+        return bool(self.possible_targets >> square(*position) & 1)
+        
+    def move_selected_piece(self, to_position, promotion=None):
+        if self.selected_piece is None:
+            return False
+        if promotion is not None and promotion not in PROMOTIONS:
+            return False
+            
+        # The selection was checked against the cached legal moves of this
+        # ply; book and engine moves are checked the same way.
+        targets = self.move_cache.get(self.board)[square(*self.selected_piece)]
+        if not targets >> square(*to_position) & 1:
+            return False
+        self.board.make_move(self.selected_piece, to_position, promotion)
+        self.selected_piece = None
+        self.possible_moves = []
+        self.possible_targets = 0
+        
+        self.update_game_over()
+        return True
+        
+    def update_game_over(self):
+        color = self.board.current_player
+        self.tablebase_result = None
+        if self.board.is_checkmate(color):
+            self.game_over = True
+            self.winner = 'black' if color == 'white' else 'white'
+        elif self.board.is_draw() or is_dead_draw(*material(self.board.bitboards)):
+            self.game_over = True
+            self.winner = None
+        else:
+            self.probe_tablebases()
+
+    def probe_tablebases(self):
+        # A drawn table entry ends the game as a draw; a won one is only
+        # reported, the game goes on until the mate is on the board.
+        board = self.board
+        if popcount(board.bitboards.all) > tablebases.max_pieces:
+            return
+        value = tablebases.probe(board)
+        if value is None:
+            return
+        if value == 0:
+            self.game_over = True
+            self.winner = None
+        elif value > 0:
+            self.tablebase_result = (board.current_player, value)
+        else:
+            other = 'black' if board.current_player == 'white' else 'white'
+            self.tablebase_result = (other, -value - 1)
+            
+    def is_ai_turn(self):
+        return not self.game_over and self.board.current_player == self.ai_color
+        
+    def play_book_move(self):
+        book = get_book(self.book_path) if self.book_path else None
+        move = book.choose(self.board) if book is not None else None
+        if move is None:
+            return False
+        self.selected_piece = move[0]
+        return self.move_selected_piece(move[1], move[2])
+        
+    def play_ai_move(self):
+        if self.play_book_move():
+            return True
+        if self.engine is None:
+            self.engine = Engine(time_limit=self.ai_time, tablebases=tablebases)
+        return self.apply_search_result(self.engine.search(self.board))
+        
+    def apply_search_result(self, result):
+        if result['move'] is None:
+            return False
+        self.last_search = result
+        from_pos, to_pos = result['move']
+        self.selected_piece = from_pos
+        return self.move_selected_piece(to_pos)
+        
+    def undo_move(self):
+        if self.board.unmake_move() is None:
+            return False
+        if self.board.current_player == self.ai_color:
+            self.board.unmake_move()
+        self.selected_piece = None
+        self.possible_moves = []
+        self.possible_targets = 0
+        self.game_over = False
+        self.winner = None
+        self.tablebase_result = None
+        self.probe_tablebases()
+        self.saved_plies = min(self.saved_plies, len(self.board.move_history))
+        return True
+        
+    def get_game_state(self):
+        return {
+            'board': self.board,
+            'current_player': self.board.current_player,
+            'selected_piece': self.selected_piece,
+            'possible_moves': self.possible_moves,
+            'game_over': self.game_over,
+            'winner': self.winner,
+            'captured_white': self.board.captured_pieces['white'],
+            'captured_black': self.board.captured_pieces['black']
+        }
+
+    def save_game(self, slot=1):
+        os.makedirs(SAVE_DIR, exist_ok=True)
+        path = slot_path(SAVE_DIR, slot)
+        fen = self.board.start_fen
+        moves = self.board.move_history
+        # Saving again into the slot the game came from only appends the plies
+        # played since, two bytes each.
+        if slot != self.saved_slot or not append_moves(path, fen, moves, self.saved_plies):
+            write_save(path, fen, moves)
+        self.saved_slot = slot
+        self.saved_plies = len(moves)
+        save_index.invalidate()
+        return True
+    
+    def replay(self, fen, moves):
+        self.__init__(self.ai_color, self.ai_time, self.book_path)
+        self.board.load_fen(fen)
+        for move in moves:
+            if not self.board.move_piece(*move):
+                from_pos, to_pos, promotion = move
+                if promotion not in PROMOTIONS:
+                    promotion = None
+                raise ValueError(f"недопустимый ход {move_to_uci(from_pos, to_pos, promotion)}")
+        self.update_game_over()
+    
+    def load_game(self, slot=1):
+        try:
+            path = slot_path(SAVE_DIR, slot)
+            if os.path.exists(path):
+                self.replay(*read_save(path))
+                self.saved_slot = slot
+                self.saved_plies = len(self.board.move_history)
+            else:
+                self._load_legacy(legacy_slot_path(SAVE_DIR, slot))
+            return True
+        except Exception as e:
+            print(f"Ошибка загрузки: {e}")
+            return False
+    
+    def _load_legacy(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            save_data = json.load(f)
+        
+        self.__init__(self.ai_color, self.ai_time, self.book_path)
+        board = self.board
+        board.board = [[None for _ in range(8)] for _ in range(8)]
+        moved = set()
+        for y in range(8):
+            for x in range(8):
+                piece_data = save_data['board'][y][x]
+                if piece_data:
+                    board.board[y][x] = PIECES[piece_data['type'], piece_data['color']]
+                    if piece_data['has_moved']:
+                        moved.add((x, y))
+        
+        # Old saves wrote knights as 'k' as well. Per color the one closest to
+        # the king's home square is taken to be the king, the rest are knights.
+        for color, home_y in (('white', 7), ('black', 0)):
+            kings = [(x, y) for y in range(8) for x in range(8)
+                     if board.board[y][x] is PIECES['k', color]]
+            kings.sort(key=lambda pos: abs(pos[0] - 4) + abs(pos[1] - home_y))
+            for x, y in kings[1:]:
+                board.board[y][x] = PIECES['h', color]
+        
+        # The old format kept no castling flags, only whether each piece had
+        # moved; the move history cannot be replayed, so the loaded position
+        # becomes the start of the new move log.
+        board.current_player = save_data['metadata']['current_player']
+        board.castling_rights = 0
+        for i, (king_x, rook_x, y) in enumerate(LEGACY_CASTLING):
+            king = board.board[y][king_x]
+            rook = board.board[y][rook_x]
+            if (king is not None and king.symbol == 'k' and rook is not None and rook.symbol == 'r'
+                    and king.color == rook.color
+                    and (king_x, y) not in moved and (rook_x, y) not in moved):
+                board.castling_rights |= 1 << i
+        board.rebuild()
+        board.start_fen = board.get_fen()
+        
+        for color in ['white', 'black']:
+            for piece_str in save_data['captured'][color]:
+                piece_color = 'white' if piece_str[0] == 'w' else 'black'
+                symbol = piece_str[1].lower()
+                board.captured_pieces[color].append(PIECES['h' if symbol == 'k' else symbol, piece_color])
+        
+        self.update_game_over()
+    
+    def get_save_slots(self, count=5, first=1):
+        return save_index.get_slots(count, first)
@@ -0,0 +1,34 @@
+from collections import OrderedDict
+
+
+class LegalMoveCache:
+    # Legal moves of whole positions keyed by Zobrist hash: for the side to
+    # move, a 64-entry list of destination bitmasks indexed by from-square.
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+
+    def get(self, board):
+        key = board.hash
+        targets = self.entries.get(key)
+        if targets is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return targets
+
+        self.misses += 1
+        targets = [0] * 64
+        for from_sq, to_sq in board.legal_moves():
+            targets[from_sq] |= 1 << to_sq
+        self.entries[key] = targets
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return targets
+
+    def get_stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
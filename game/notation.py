@@ -0,0 +1,29 @@
+FILES = 'abcdefgh'
+RANKS = '12345678'
+PROMOTION_LETTERS = 'pnbrqk'
+
+
+def square_name(position):
+    x, y = position
+    return f"{FILES[x]}{8 - y}"
+
+
+def parse_square(name):
+    if name == '-':
+        return None
+    return FILES.index(name[0]), 8 - int(name[1])
+
+
+def move_to_uci(from_pos, to_pos, promotion=None):
+    text = square_name(from_pos) + square_name(to_pos)
+    if promotion is not None:
+        text += PROMOTION_LETTERS[promotion]
+    return text
+
+
+def parse_uci_move(text):
+    if not (4 <= len(text) <= 5 and text[0] in FILES and text[1] in RANKS
+            and text[2] in FILES and text[3] in RANKS and (len(text) == 4 or text[4] in 'nbrq')):
+        raise ValueError(f"недопустимый ход {text}")
+    promotion = PROMOTION_LETTERS.index(text[4]) if len(text) > 4 else None
+    return parse_square(text[0:2]), parse_square(text[2:4]), promotion
@@ -0,0 +1,233 @@
+import re
+from collections import namedtuple
+
+from .bitboard import (COLOR_INDEX, COLUMN_MASKS, ROW_MASKS, SQUARE_POSITIONS,
+                       PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, bit)
+from .chess_board import ChessBoard, START_FEN
+from .notation import FILES, parse_square, square_name
+
+
+PGNGame = namedtuple('PGNGame', 'headers moves result')
+
+SAN_PIECES = {'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING}
+PIECE_LETTERS = {kind: letter for letter, kind in SAN_PIECES.items()}
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+ROSTER = ('Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result')
+
+SAN_MOVE = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+TAG_PAIR = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+TOKEN = re.compile(r'\{[^}]*\}?|;[^\n]*|[()]|[^\s(){};]+')
+MOVE_NUMBER = re.compile(r'^\d+\.*')
+LINE_WIDTH = 79
+
+
+def parse_san(board, san):
+    text = san.rstrip('+#!?')
+    us = COLOR_INDEX[board.current_player]
+    bitboards = board.bitboards
+    promotion = None
+    if text in ('O-O', 'O-O-O', '0-0', '0-0-0'):
+        king = bitboards.king_square(us)
+        _, y = SQUARE_POSITIONS[king]
+        from_mask = 1 << king
+        to_mask = bit(6 if len(text) == 3 else 2, y)
+    else:
+        match = SAN_MOVE.match(text)
+        if match is None:
+            raise ValueError(f"не удалось разобрать ход {san}")
+        letter, file, rank, target, promoted = match.groups()
+        kind = SAN_PIECES[letter] if letter else PAWN
+        to_x, to_y = parse_square(target)
+        if kind == PAWN and to_y in (0, 7):
+            promotion = SAN_PIECES[promoted] if promoted else QUEEN
+        elif promoted is not None:
+            raise ValueError(f"недопустимое превращение {san}")
+        from_mask = bitboards.pieces[us][kind]
+        if file is not None:
+            from_mask &= COLUMN_MASKS[FILES.index(file)]
+        elif kind == PAWN:
+            from_mask &= COLUMN_MASKS[to_x]
+        if rank is not None:
+            from_mask &= ROW_MASKS[8 - int(rank)]
+        to_mask = bit(to_x, to_y)
+
+    moves = board.legal_moves(from_mask, to_mask)
+    if len(moves) != 1:
+        problem = 'неоднозначный' if moves else 'недопустимый'
+        raise ValueError(f"{problem} ход {san}")
+    from_sq, to_sq = moves[0]
+    return SQUARE_POSITIONS[from_sq], SQUARE_POSITIONS[to_sq], promotion
+
+
+def move_to_san(board, from_pos, to_pos, promotion=None):
+    from_x, from_y = from_pos
+    to_x, to_y = to_pos
+    piece = board.get_piece(from_pos)
+    capture = board.get_piece(to_pos) is not None
+    if piece.kind == KING and abs(to_x - from_x) == 2:
+        san = 'O-O' if to_x > from_x else 'O-O-O'
+    elif piece.kind == PAWN:
+        san = f"{FILES[from_x]}x" if capture or from_x != to_x else ''
+        san += square_name(to_pos)
+        if to_y in (0, 7):
+            promotion = promotion or QUEEN
+            san += '=' + PIECE_LETTERS[promotion]
+    else:
+        us = COLOR_INDEX[piece.color]
+        others = board.bitboards.pieces[us][piece.kind] & ~bit(from_x, from_y)
+        rivals = [SQUARE_POSITIONS[sq] for sq, _ in
+                  board.bitboards.legal_moves(us, others, bit(to_x, to_y))]
+        san = PIECE_LETTERS[piece.kind]
+        if rivals:
+            if all(x != from_x for x, _ in rivals):
+                san += FILES[from_x]
+            elif all(y != from_y for _, y in rivals):
+                san += str(8 - from_y)
+            else:
+                san += square_name(from_pos)
+        if capture:
+            san += 'x'
+        san += square_name(to_pos)
+
+    board.make_move(from_pos, to_pos, promotion)
+    color = board.current_player
+    if board.is_check(color):
+        san += '+' if board.has_legal_moves(color) else '#'
+    board.unmake_move()
+    return san
+
+
+def parse_movetext(text):
+    moves = []
+    result = None
+    depth = 0
+    for token in TOKEN.findall(text):
+        first = token[0]
+        if first in '{;$':
+            continue
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(0, depth - 1)
+        elif depth:
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            token = MOVE_NUMBER.sub('', token)
+            if token:
+                moves.append(token)
+    return moves, result
+
+
+def _make_game(headers, movetext):
+    moves, result = parse_movetext('\n'.join(movetext))
+    return PGNGame(headers, moves, result or headers.get('Result', '*'))
+
+
+def read_games(lines):
+    # Only the current game is held in memory, so this works on files of any
+    # size opened in text mode.
+    headers = {}
+    movetext = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            if movetext:
+                yield _make_game(headers, movetext)
+                headers = {}
+                movetext = []
+            match = TAG_PAIR.match(line)
+            if match is not None:
+                headers[match.group(1)] = re.sub(r'\\(.)', r'\1', match.group(2))
+        elif line and not line.startswith('%'):
+            movetext.append(line)
+    if headers or movetext:
+        yield _make_game(headers, movetext)
+
+
+def replay(game, board=None):
+    if board is None:
+        board = ChessBoard(game.headers.get('FEN', START_FEN))
+    for ply, san in enumerate(game.moves):
+        try:
+            board.make_move(*parse_san(board, san))
+        except ValueError as e:
+            raise ValueError(f"полуход {ply + 1}: {e}") from None
+    return board
+
+
+def _wrap(tokens):
+    lines = []
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_WIDTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    if line:
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def format_game(headers, sans, result='*', fen=START_FEN):
+    headers = dict(headers)
+    headers['Result'] = result
+    if fen != START_FEN:
+        headers['SetUp'] = '1'
+        headers['FEN'] = fen
+    names = list(ROSTER) + [name for name in headers if name not in ROSTER]
+    lines = []
+    for name in names:
+        value = str(headers.get(name, '?')).replace('\\', '\\\\').replace('"', '\\"')
+        lines.append(f'[{name} "{value}"]')
+
+    fields = fen.split()
+    number = int(fields[5]) if len(fields) > 5 else 1
+    black = fields[1] == 'b'
+    tokens = []
+    for i, san in enumerate(sans):
+        if not black:
+            tokens.append(f"{number}.")
+        elif i == 0:
+            tokens.append(f"{number}...")
+        tokens.append(san)
+        if black:
+            number += 1
+        black = not black
+    tokens.append(result)
+    return '\n'.join(lines) + '\n\n' + _wrap(tokens) + '\n'
+
+
+def board_to_sans(board):
+    replayed = ChessBoard(board.start_fen)
+    sans = []
+    for move in board.move_history:
+        sans.append(move_to_san(replayed, *move))
+        replayed.make_move(*move)
+    return sans
+
+
+def board_result(board):
+    color = board.current_player
+    if board.is_checkmate(color):
+        return '0-1' if color == 'white' else '1-0'
+    if board.is_stalemate(color):
+        return '1/2-1/2'
+    return '*'
+
+
+def board_to_pgn(board, headers=None, result=None):
+    return format_game(headers or {}, board_to_sans(board),
+                       result or board_result(board), board.start_fen)
+
+
+def write_games(f, games):
+    count = 0
+    for headers, sans, result, fen in games:
+        if count:
+            f.write('\n')
+        f.write(format_game(headers, sans, result, fen))
+        count += 1
+    return count
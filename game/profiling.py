@@ -0,0 +1,175 @@
+import functools
+import heapq
+import json
+import marshal
+import time
+
+
+HISTOGRAM_BUCKETS = 24
+
+
+class Timer:
+    __slots__ = ('name', 'code', 'calls', 'total', 'own', 'max', 'histogram', 'slowest')
+
+    def __init__(self, name, code):
+        self.name = name
+        self.code = code
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.max = 0.0
+        # Bucket i counts calls that took less than 2**i microseconds.
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self.slowest = []
+
+    def report(self):
+        return {
+            'calls': self.calls,
+            'total_ms': round(self.total * 1000, 3),
+            'own_ms': round(self.own * 1000, 3),
+            'avg_us': round(self.total / self.calls * 1e6, 3) if self.calls else None,
+            'max_us': round(self.max * 1e6, 3),
+            'histogram': [{'lt_us': 1 << i, 'count': count}
+                          for i, count in enumerate(self.histogram) if count],
+            'slowest': [{'us': round(seconds * 1e6, 3), 'position': position}
+                        for seconds, position in sorted(self.slowest, reverse=True)],
+        }
+
+
+def _board_fen(args):
+    return args[0].get_fen()
+
+
+def _game_fen(args):
+    return args[0].board.get_fen()
+
+
+def _cached_fen(args):
+    return args[1].get_fen()
+
+
+def game_targets():
+    # Imported here so that the board modules never depend on this one.
+    from .bitboard import Bitboards
+    from .chess_board import ChessBoard
+    from .game_logic import ChessGame
+    from .move_cache import LegalMoveCache
+    from .search_worker import SearchWorker
+    return [
+        (ChessBoard, 'legal_moves', _board_fen),
+        (Bitboards, 'legal_moves', None),
+        (LegalMoveCache, 'get', _cached_fen),
+        (ChessBoard, 'make_move', _board_fen),
+        (ChessBoard, 'is_checkmate', _board_fen),
+        (ChessGame, 'move_selected_piece', _game_fen),
+        (ChessGame, 'update_game_over', _game_fen),
+        (ChessGame, 'save_game', _game_fen),
+        (ChessGame, 'load_game', None),
+        (SearchWorker, 'poll', None),
+    ]
+
+
+class Profiler:
+    # Instrumentation is installed by replacing methods with timing wrappers
+    # and removed by putting the originals back, so a disabled profiler costs
+    # nothing at all.
+    def __init__(self, keep_slowest=10):
+        self.keep_slowest = keep_slowest
+        self.timers = {}
+        self.patched = []
+        self.stack = []
+        self.started = None
+
+    @property
+    def enabled(self):
+        return bool(self.patched)
+
+    def instrument(self, owner, attribute, describe=None, name=None):
+        original = owner.__dict__[attribute]
+        name = name or f"{owner.__name__}.{attribute}"
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Timer(name, original.__code__)
+        stack = self.stack
+        perf_counter = time.perf_counter
+        keep = self.keep_slowest
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            # Described before the call: afterwards make_move would report
+            # the position the move led to. Kept outside the timed span.
+            position = describe(args) if describe is not None else None
+            stack.append(0.0)
+            start = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                timer.calls += 1
+                timer.total += elapsed
+                timer.own += elapsed - children
+                if elapsed > timer.max:
+                    timer.max = elapsed
+                micros = int(elapsed * 1e6)
+                timer.histogram[min(micros.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+                if describe is not None:
+                    slowest = timer.slowest
+                    if len(slowest) < keep:
+                        heapq.heappush(slowest, (elapsed, position))
+                    elif elapsed > slowest[0][0]:
+                        heapq.heapreplace(slowest, (elapsed, position))
+
+        setattr(owner, attribute, wrapper)
+        self.patched.append((owner, attribute, original))
+
+    def enable(self, targets=None):
+        if targets is None and self.enabled:
+            return
+        if self.started is None:
+            self.started = time.perf_counter()
+        for owner, attribute, describe in (game_targets() if targets is None else targets):
+            self.instrument(owner, attribute, describe)
+
+    def disable(self):
+        while self.patched:
+            owner, attribute, original = self.patched.pop()
+            setattr(owner, attribute, original)
+
+    def reset(self):
+        for timer in self.timers.values():
+            timer.__init__(timer.name, timer.code)
+        self.started = time.perf_counter() if self.started is not None else None
+
+    def top(self, count=10):
+        timers = [timer for timer in self.timers.values() if timer.calls]
+        timers.sort(key=lambda timer: timer.own, reverse=True)
+        return timers[:count]
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        return {
+            'seconds': round(elapsed, 6),
+            'timers': {name: timer.report() for name, timer in sorted(self.timers.items())},
+        }
+
+    def dump_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+    def dump_stats(self, path):
+        # The marshal layout pstats.Stats reads:
+        # {(file, line, function): (primitive calls, calls, own, total, callers)}
+        stats = {}
+        for timer in self.timers.values():
+            if timer.calls:
+                key = (timer.code.co_filename, timer.code.co_firstlineno, timer.name)
+                stats[key] = (timer.calls, timer.calls, timer.own, timer.total, {})
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
+
+
+profiler = Profiler()
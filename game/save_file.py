@@ -0,0 +1,76 @@
+import os
+import struct
+
+from .bitboard import SQUARE_POSITIONS, square
+
+
+MAGIC = b'CHSV'
+VERSION = 1
+HEADER = struct.Struct('<4sBH')
+MOVE_BYTES = 2
+
+
+# A save is a small header with the starting FEN followed by one little-endian
+# 16-bit word per ply: bits 0-5 from square, bits 6-11 to square, the top four
+# bits hold the promotion piece kind (0 when the move does not promote).
+def pack_move(from_pos, to_pos, promotion=None):
+    return square(*from_pos) | (square(*to_pos) << 6) | ((promotion or 0) << 12)
+
+
+def unpack_move(packed):
+    return (SQUARE_POSITIONS[packed & 63], SQUARE_POSITIONS[(packed >> 6) & 63],
+            (packed >> 12) or None)
+
+
+def encode_moves(moves):
+    return struct.pack(f'<{len(moves)}H', *(pack_move(*move) for move in moves))
+
+
+def decode_moves(data):
+    count = len(data) // MOVE_BYTES
+    return [unpack_move(packed) for packed in struct.unpack_from(f'<{count}H', data)]
+
+
+def read_header(f):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError("файл сохранения повреждён")
+    magic, version, fen_length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("неизвестный формат сохранения")
+    fen = f.read(fen_length).decode('ascii')
+    return fen, HEADER.size + fen_length
+
+
+def read_save(path):
+    with open(path, 'rb') as f:
+        fen, _ = read_header(f)
+        # A torn trailing byte from an interrupted append is ignored.
+        return fen, decode_moves(f.read())
+
+
+def write_save(path, fen, moves):
+    fen_bytes = fen.encode('ascii')
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(fen_bytes)))
+        f.write(fen_bytes)
+        f.write(encode_moves(moves))
+    os.replace(path + '.tmp', path)
+
+
+def append_moves(path, fen, moves, start):
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        return False
+    with f:
+        try:
+            saved_fen, offset = read_header(f)
+        except ValueError:
+            return False
+        if saved_fen != fen or os.fstat(f.fileno()).st_size < offset + start * MOVE_BYTES:
+            return False
+        f.seek(offset + start * MOVE_BYTES)
+        f.truncate()
+        f.write(encode_moves(moves[start:]))
+    return True
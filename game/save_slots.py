@@ -0,0 +1,103 @@
+import json
+import os
+import re
+from datetime import datetime
+
+from .save_file import MOVE_BYTES, read_header
+
+
+SLOT_FILE = re.compile(r'^save_(\d+)\.(chs|json)$')
+
+
+def slot_path(directory, slot):
+    return os.path.join(directory, f'save_{slot}.chs')
+
+
+def legacy_slot_path(directory, slot):
+    return os.path.join(directory, f'save_{slot}.json')
+
+
+def read_slot_info(path):
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {
+            'exists': True,
+            'date': data['metadata']['date'],
+            'player': data['metadata']['current_player']
+        }
+
+    with open(path, 'rb') as f:
+        fen, offset = read_header(f)
+        stat = os.fstat(f.fileno())
+    plies = (stat.st_size - offset) // MOVE_BYTES
+    black = (fen.split()[1] == 'b') != bool(plies & 1)
+    return {
+        'exists': True,
+        'date': datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+        'player': 'black' if black else 'white'
+    }
+
+
+class SaveSlotIndex:
+    def __init__(self, directory='saves'):
+        self.directory = directory
+        self.directory_mtime = None
+        self.entries = {}
+
+    def invalidate(self):
+        self.directory_mtime = None
+
+    def refresh(self):
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            self.directory_mtime = None
+            self.entries = {}
+            return
+        if mtime == self.directory_mtime:
+            return
+
+        # Full saves are written with os.replace, so any new, removed or
+        # rewritten slot bumps the directory mtime. Appending moves only touches
+        # the file, which is why save_game invalidates the index itself.
+        files = {}
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                match = SLOT_FILE.match(entry.name)
+                if match is None:
+                    continue
+                # A slot saved since the format change can still have its old
+                # JSON file lying next to it; the binary save wins.
+                slot = int(match.group(1))
+                if slot not in files or match.group(2) == 'chs':
+                    files[slot] = entry
+
+        entries = {}
+        for slot, entry in files.items():
+            file_mtime = entry.stat().st_mtime_ns
+            cached = self.entries.get(slot)
+            if cached is not None and cached[:2] == (entry.name, file_mtime):
+                entries[slot] = cached
+                continue
+            try:
+                entries[slot] = (entry.name, file_mtime, read_slot_info(entry.path))
+            except (OSError, ValueError, KeyError, TypeError, IndexError):
+                continue
+        self.entries = entries
+        self.directory_mtime = mtime
+
+    def _slot_info(self, slot):
+        entry = self.entries.get(slot)
+        info = {'slot': slot, 'exists': False}
+        if entry is not None:
+            info.update(entry[2])
+        return info
+
+    def get_slot(self, slot):
+        self.refresh()
+        return self._slot_info(slot)
+
+    def get_slots(self, count, first=1):
+        self.refresh()
+        return [self._slot_info(slot) for slot in range(first, first + count)]
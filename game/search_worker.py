@@ -0,0 +1,106 @@
+import multiprocessing
+import queue
+
+from .chess_board import ChessBoard
+from .engine import Engine
+from .tablebase import Tablebases
+
+
+class _JobCancelled:
+    def __init__(self, wanted_job, job_id):
+        self.wanted_job = wanted_job
+        self.job_id = job_id
+
+    def is_set(self):
+        return self.wanted_job.value != self.job_id
+
+
+def _worker_main(jobs, results, wanted_job):
+    engine = Engine(tablebases=Tablebases())
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, fen, time_limit, max_depth = job
+        if wanted_job.value != job_id:
+            continue
+        board = ChessBoard(fen)
+        engine.stop_event = _JobCancelled(wanted_job, job_id)
+
+        def report(info):
+            results.put(('info', job_id, info))
+
+        try:
+            result = engine.search(board, time_limit=time_limit, max_depth=max_depth,
+                                   on_iteration=report)
+        except Exception as e:
+            results.put(('error', job_id, str(e)))
+            continue
+        results.put(('done', job_id, result))
+
+
+class SearchWorker:
+    def __init__(self):
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.jobs = None
+        self.results = None
+        self.wanted_job = None
+        self.job_id = 0
+        self.active_job = None
+        self.active_hash = None
+
+    def start(self):
+        if self.process is not None and self.process.is_alive():
+            return
+        self.jobs = self.context.Queue()
+        self.results = self.context.Queue()
+        self.wanted_job = self.context.RawValue('l', 0)
+        self.process = self.context.Process(
+            target=_worker_main, args=(self.jobs, self.results, self.wanted_job), daemon=True)
+        self.process.start()
+
+    @property
+    def busy(self):
+        return self.active_job is not None
+
+    def submit(self, board, time_limit=1.0, max_depth=None):
+        self.start()
+        self.job_id += 1
+        self.active_job = self.job_id
+        self.active_hash = board.hash
+        self.wanted_job.value = self.job_id
+        self.jobs.put((self.job_id, board.get_fen(), time_limit, max_depth))
+        return self.job_id
+
+    def cancel(self):
+        if self.wanted_job is not None:
+            self.wanted_job.value = 0
+        self.active_job = None
+        self.active_hash = None
+
+    def poll(self):
+        messages = []
+        if self.results is None:
+            return messages
+        while True:
+            try:
+                kind, job_id, payload = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if job_id != self.active_job:
+                continue
+            if kind != 'info':
+                self.active_job = None
+            messages.append((kind, payload))
+        return messages
+
+    def shutdown(self):
+        if self.process is None:
+            return
+        self.cancel()
+        self.jobs.put(None)
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
@@ -0,0 +1,427 @@
+import mmap
+import os
+import struct
+from array import array
+
+from .bitboard import (WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                       KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, iter_bits,
+                       bishop_attacks, queen_attacks, rook_attacks)
+
+
+TABLEBASE_DIR = 'tablebases'
+TABLE_EXTENSION = '.tbl'
+
+MAGIC = b'CHTB'
+VERSION = 1
+HEADER = struct.Struct('<4sB8s')
+
+LETTERS = 'PNBRQK'
+STRENGTH = (KING, QUEEN, ROOK, BISHOP, KNIGHT, PAWN)
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Values are signed bytes from the side to move's point of view: 0 is a draw,
+# n > 0 mates in n plies and n < 0 is mated in -n - 1 plies (-1 is checkmate).
+MAX_PLIES = 126
+
+
+def _transform(sq, t):
+    x, y = sq & 7, sq >> 3
+    if t & 1:
+        x = 7 - x
+    if t & 2:
+        y = 7 - y
+    if t & 4:
+        x, y = y, x
+    return y * 8 + x
+
+
+TRANSFORMS = [[_transform(sq, t) for sq in range(64)] for t in range(8)]
+
+
+def _king_region(pawns):
+    # The white king is mirrored into a1-d1-d4 without pawns and onto the
+    # a-d files with them (pawns only allow the left-right mirror).
+    if pawns:
+        return [sq for sq in range(64) if sq & 7 <= 3]
+    return [sq for sq in range(64) if sq & 7 <= 3 and sq >> 3 >= 4 and 7 - (sq >> 3) <= sq & 7]
+
+
+def _king_transforms(region, transforms):
+    inside = set(region)
+    return [[t for t in transforms if TRANSFORMS[t][sq] in inside] for sq in range(64)]
+
+
+KING_SQUARES = [_king_region(False), _king_region(True)]
+KING_INDEX = [{sq: i for i, sq in enumerate(squares)} for squares in KING_SQUARES]
+KING_TRANSFORM = [_king_transforms(KING_SQUARES[0], range(8)),
+                  _king_transforms(KING_SQUARES[1], (0, 1))]
+
+
+def _piece_order(color, kind):
+    if kind == KING:
+        return 0, color, 0
+    return 1, color, STRENGTH.index(kind)
+
+
+def signature(white_kinds, black_kinds):
+    def side(kinds):
+        return ''.join(LETTERS[kind] for kind in sorted(kinds, key=STRENGTH.index))
+    return f"{side(white_kinds)}v{side(black_kinds)}"
+
+
+def canonical_signature(white_kinds, black_kinds):
+    def strength(kinds):
+        others = sorted(STRENGTH.index(kind) for kind in kinds if kind != KING)
+        return -len(others), others
+    if strength(black_kinds) < strength(white_kinds):
+        return signature(black_kinds, white_kinds)
+    return signature(white_kinds, black_kinds)
+
+
+def parse_signature(name):
+    white, black = name.split('v')
+    return [LETTERS.index(letter) for letter in white], [LETTERS.index(letter) for letter in black]
+
+
+def is_dead_draw(white_kinds, black_kinds):
+    kinds = [kind for kind in white_kinds + black_kinds if kind != KING]
+    return len(kinds) <= 1 and all(kind in (KNIGHT, BISHOP) for kind in kinds)
+
+
+def material(bitboards):
+    return tuple([kind for kind in range(6) for _ in iter_bits(bitboards.pieces[color][kind])]
+                 for color in (WHITE, BLACK))
+
+
+class Table:
+    def __init__(self, name, data=None, offset=0):
+        self.name = name
+        white, black = parse_signature(name)
+        self.pieces = sorted([(WHITE, kind) for kind in white] + [(BLACK, kind) for kind in black],
+                             key=lambda piece: _piece_order(*piece))
+        self.pawns = int(PAWN in white or PAWN in black)
+        self.side_size = len(KING_SQUARES[self.pawns]) * 64 ** (len(self.pieces) - 1)
+        self.size = 2 * self.side_size
+        self.data = data
+        self.offset = offset
+
+    def index(self, squares, black_to_move):
+        # With the white king on the a1-d4 diagonal two transforms keep it in
+        # the region; the smaller index is the canonical one.
+        best = None
+        for t in KING_TRANSFORM[self.pawns][squares[0]]:
+            table = TRANSFORMS[t]
+            index = KING_INDEX[self.pawns][table[squares[0]]]
+            for sq in squares[1:]:
+                index = index * 64 + table[sq]
+            if best is None or index < best:
+                best = index
+        return best + self.side_size if black_to_move else best
+
+    def decode(self, index):
+        black_to_move = index >= self.side_size
+        if black_to_move:
+            index -= self.side_size
+        squares = []
+        for _ in range(len(self.pieces) - 1):
+            squares.append(index & 63)
+            index >>= 6
+        squares.append(KING_SQUARES[self.pawns][index])
+        squares.reverse()
+        return squares, black_to_move
+
+    def order(self, pieces):
+        return [sq for _, _, sq in sorted(pieces, key=lambda piece: _piece_order(piece[0], piece[1]))]
+
+    def value(self, squares, black_to_move):
+        value = self.data[self.offset + self.index(squares, black_to_move)]
+        return value - 256 if value > 127 else value
+
+
+def probe_pieces(get_table, pieces, black_to_move):
+    white = [kind for color, kind, _ in pieces if color == WHITE]
+    black = [kind for color, kind, _ in pieces if color == BLACK]
+    if is_dead_draw(white, black):
+        return 0
+    table = get_table(signature(white, black))
+    if table is None:
+        # Tables are stored with the stronger side as white; the mirrored
+        # position with colours swapped has the same value.
+        table = get_table(signature(black, white))
+        if table is None:
+            return None
+        pieces = [(color ^ 1, kind, sq ^ 56) for color, kind, sq in pieces]
+        black_to_move = not black_to_move
+    return table.value(table.order(pieces), black_to_move)
+
+
+def read_table(path):
+    with open(path, 'rb') as f:
+        magic, version, name = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"неизвестный формат таблицы: {path}")
+        table = Table(name.rstrip(b'\0').decode('ascii'))
+        table.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        table.offset = HEADER.size
+    if len(table.data) != HEADER.size + table.size:
+        raise ValueError(f"повреждённая таблица: {path}")
+    return table
+
+
+def write_table(directory, table):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, table.name + TABLE_EXTENSION)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, table.name.encode('ascii')))
+        f.write(table.data)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+class Tablebases:
+    def __init__(self, directory=TABLEBASE_DIR):
+        self.directory = directory
+        self.tables = {}
+        self.available = set()
+        self.max_pieces = 0
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(TABLE_EXTENSION):
+                    self.available.add(name[:-len(TABLE_EXTENSION)])
+        if self.available:
+            self.max_pieces = max(len(name) - 1 for name in self.available)
+
+    def get_table(self, name):
+        if name not in self.tables:
+            table = None
+            if name in self.available:
+                table = read_table(os.path.join(self.directory, name + TABLE_EXTENSION))
+            self.tables[name] = table
+        return self.tables[name]
+
+    def probe(self, board):
+        if board.castling_rights or board.en_passant is not None:
+            return None
+        bitboards = board.bitboards
+        pieces = [(color, kind, sq) for color in range(2) for kind in range(6)
+                  for sq in iter_bits(bitboards.pieces[color][kind])]
+        if len(pieces) > self.max_pieces:
+            return None
+        return probe_pieces(self.get_table, pieces, board.current_player == 'black')
+
+    def close(self):
+        for table in self.tables.values():
+            if table is not None:
+                table.data.close()
+        self.tables = {}
+
+
+def _attacks(kind, color, sq, occupied):
+    if kind == PAWN:
+        return PAWN_ATTACKS[color][sq]
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if kind == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if kind == ROOK:
+        return rook_attacks(sq, occupied)
+    if kind == QUEEN:
+        return queen_attacks(sq, occupied)
+    return KING_ATTACKS[sq]
+
+
+def _attacked(pieces, squares, target, by_color, occupied, skip=None):
+    for i, (color, kind) in enumerate(pieces):
+        if color == by_color and i != skip and _attacks(kind, color, squares[i], occupied) >> target & 1:
+            return True
+    return False
+
+
+def _is_legal(table, squares, black_to_move):
+    if len(set(squares)) != len(squares):
+        return False
+    for (color, kind), sq in zip(table.pieces, squares):
+        if kind == PAWN and sq >> 3 in (0, 7):
+            return False
+    occupied = 0
+    for sq in squares:
+        occupied |= 1 << sq
+    # The side that just moved cannot have left its king in check.
+    waiting = WHITE if black_to_move else BLACK
+    return not _attacked(table.pieces, squares, squares[waiting], waiting ^ 1, occupied)
+
+
+def _forward_moves(table, squares, us, occupied, own):
+    for i, (color, kind) in enumerate(table.pieces):
+        if color != us:
+            continue
+        sq = squares[i]
+        if kind == PAWN:
+            step = -8 if us == WHITE else 8
+            targets = PAWN_ATTACKS[us][sq] & occupied & ~own
+            if not occupied >> (sq + step) & 1:
+                targets |= 1 << (sq + step)
+                start_row = 6 if us == WHITE else 1
+                if sq >> 3 == start_row and not occupied >> (sq + 2 * step) & 1:
+                    targets |= 1 << (sq + 2 * step)
+        else:
+            targets = _attacks(kind, us, sq, occupied) & ~own
+        for to_sq in iter_bits(targets):
+            yield i, to_sq
+
+
+def _unmoves(table, squares, mover, occupied):
+    for i, (color, kind) in enumerate(table.pieces):
+        if color != mover:
+            continue
+        sq = squares[i]
+        if kind == PAWN:
+            back = 8 if mover == WHITE else -8
+            origin = sq + back
+            origin_row = origin >> 3
+            if 1 <= origin_row <= 6 and not occupied >> origin & 1:
+                yield i, origin
+                double = origin + back
+                if origin_row == (5 if mover == WHITE else 2) and not occupied >> double & 1:
+                    yield i, double
+        else:
+            for origin in iter_bits(_attacks(kind, mover, sq, occupied) & ~occupied):
+                yield i, origin
+
+
+def generate(name, get_table, progress=None):
+    table = Table(name)
+    pieces = table.pieces
+    size = table.size
+    values = bytearray(size)
+    legal = bytearray(size)
+    resolved = bytearray(size)
+    counts = bytearray(size)
+    blocked = bytearray(size)
+    slowest = array('b', [-1]) * size
+    pending = [[] for _ in range(MAX_PLIES + 2)]
+
+    def schedule(index, plies):
+        if plies > MAX_PLIES:
+            raise ValueError(f"{name}: мат длиннее {MAX_PLIES} полуходов")
+        pending[plies].append(index)
+
+    for index in range(size):
+        if progress and not index % 100000:
+            progress(name, index, size)
+        squares, black_to_move = table.decode(index)
+        if table.index(squares, black_to_move) != index or not _is_legal(table, squares, black_to_move):
+            continue
+        legal[index] = 1
+        us = BLACK if black_to_move else WHITE
+        occupied = own = 0
+        for (color, _), sq in zip(pieces, squares):
+            occupied |= 1 << sq
+            if color == us:
+                own |= 1 << sq
+
+        children = set()
+        best_win = None
+        moves = 0
+        for i, to_sq in _forward_moves(table, squares, us, occupied, own):
+            captured = next((j for j, sq in enumerate(squares) if sq == to_sq), None)
+            moved = list(squares)
+            moved[i] = to_sq
+            after = (occupied & ~(1 << squares[i])) | (1 << to_sq)
+            king = moved[us]
+            if _attacked(pieces, moved, king, us ^ 1, after, skip=captured):
+                continue
+            moves += 1
+
+            color, kind = pieces[i]
+            promotion = kind == PAWN and to_sq >> 3 in (0, 7)
+            if captured is None and not promotion:
+                children.add(table.index(moved, not black_to_move))
+                continue
+
+            rest = [(pieces[j][0], pieces[j][1], moved[j]) for j in range(len(pieces)) if j != captured]
+            mover_at = i if captured is None or captured > i else i - 1
+            outcomes = []
+            for new_kind in (PROMOTIONS if promotion else (kind,)):
+                rest[mover_at] = (color, new_kind, to_sq)
+                value = probe_pieces(get_table, rest, not black_to_move)
+                if value is None:
+                    raise ValueError(f"{name}: нет таблицы для {signature(*_kinds(rest))}")
+                outcomes.append(value)
+            for value in outcomes:
+                if value < 0:
+                    plies = -value
+                    best_win = plies if best_win is None else min(best_win, plies)
+                elif value == 0:
+                    blocked[index] = 1
+                else:
+                    slowest[index] = max(slowest[index], value)
+
+        if not moves:
+            if _attacked(pieces, squares, squares[us], us ^ 1, occupied):
+                schedule(index, 0)
+            else:
+                resolved[index] = 1
+            continue
+        counts[index] = len(children)
+        if best_win is not None:
+            blocked[index] = 1
+            schedule(index, best_win)
+        elif not children and not blocked[index]:
+            schedule(index, slowest[index] + 1)
+
+    for plies in range(MAX_PLIES + 1):
+        for index in pending[plies]:
+            if resolved[index]:
+                continue
+            resolved[index] = 1
+            lost = not plies & 1
+            values[index] = (256 - plies - 1) if lost else plies
+
+            squares, black_to_move = table.decode(index)
+            mover = WHITE if black_to_move else BLACK
+            occupied = 0
+            for sq in squares:
+                occupied |= 1 << sq
+            parents = set()
+            for i, origin in _unmoves(table, squares, mover, occupied):
+                moved = list(squares)
+                moved[i] = origin
+                parent = table.index(moved, not black_to_move)
+                if legal[parent]:
+                    parents.add(parent)
+            for parent in parents:
+                if resolved[parent]:
+                    continue
+                if lost:
+                    schedule(parent, plies + 1)
+                    continue
+                counts[parent] -= 1
+                slowest[parent] = max(slowest[parent], plies)
+                if not counts[parent] and not blocked[parent]:
+                    schedule(parent, slowest[parent] + 1)
+
+    table.data = bytes(values)
+    return table
+
+
+def _kinds(pieces):
+    return ([kind for color, kind, _ in pieces if color == WHITE],
+            [kind for color, kind, _ in pieces if color == BLACK])
+
+
+def dependencies(name):
+    white, black = parse_signature(name)
+    result = []
+    for side, other, flip in ((white, black, False), (black, white, True)):
+        for i, kind in enumerate(side):
+            if kind == KING:
+                continue
+            variants = [side[:i] + side[i + 1:]]
+            if kind == PAWN:
+                variants += [side[:i] + [new_kind] + side[i + 1:] for new_kind in PROMOTIONS]
+            for variant in variants:
+                kinds = (other, variant) if flip else (variant, other)
+                if not is_dead_draw(*kinds):
+                    result.append(canonical_signature(*kinds))
+    return result
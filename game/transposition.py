@@ -0,0 +1,91 @@
+from array import array
+
+
+EXACT, LOWER, UPPER = 1, 2, 3
+
+ENTRY_BYTES = 16
+SCORE_OFFSET = 1 << 31
+MOVE_MASK = 0xFFFF
+
+
+def pack_move(move):
+    if move is None:
+        return 0
+    return move[0] | (move[1] << 6) | 0x8000
+
+
+def unpack_move(packed):
+    if not packed & 0x8000:
+        return None
+    return packed & 63, (packed >> 6) & 63
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        self.size_mb = size_mb
+        self.buckets = max(1, size_mb * 1024 * 1024 // (2 * ENTRY_BYTES))
+        # Two slots per bucket: slot 0 keeps the deepest entry seen for the
+        # index, slot 1 takes whatever was stored last.
+        self.keys = array('Q', bytes(16 * self.buckets))
+        self.data = array('Q', bytes(16 * self.buckets))
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def clear(self):
+        self.keys = array('Q', bytes(16 * self.buckets))
+        self.data = array('Q', bytes(16 * self.buckets))
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        index = (key % self.buckets) * 2
+        keys = self.keys
+        for slot in (index, index + 1):
+            if keys[slot] == key:
+                data = self.data[slot]
+                if data:
+                    self.hits += 1
+                    return ((data >> 16) & 0xFF, (data >> 32) - SCORE_OFFSET,
+                            (data >> 24) & 3, unpack_move(data & MOVE_MASK))
+        if self.data[index] or self.data[index + 1]:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        index = (key % self.buckets) * 2
+        data = (pack_move(move) | (depth << 16) | (bound << 24)
+                | ((score + SCORE_OFFSET) << 32))
+        self.stores += 1
+        stored = self.data[index]
+        if self.keys[index] == key or not stored or depth >= (stored >> 16) & 0xFF:
+            self.keys[index] = key
+            self.data[index] = data
+        else:
+            self.keys[index + 1] = key
+            self.data[index + 1] = data
+
+    def usage(self, sample=1000):
+        slots = min(sample, self.buckets) * 2
+        used = sum(1 for i in range(slots) if self.data[i])
+        return used / slots
+
+    def get_stats(self):
+        probes = self.hits + self.misses
+        return {
+            'size_mb': self.size_mb,
+            'entries': self.buckets * 2,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'usage': self.usage(),
+        }
@@ -0,0 +1,36 @@
+import random
+
+from .bitboard import iter_bits
+
+
+_random = random.Random(20250620)
+
+PIECE_KEYS = [[[_random.getrandbits(64) for _ in range(64)] for _ in range(6)]
+              for _ in range(2)]
+
+_CASTLING_BITS = [_random.getrandbits(64) for _ in range(4)]
+CASTLING_KEYS = []
+for rights in range(16):
+    key = 0
+    for i, bit_key in enumerate(_CASTLING_BITS):
+        if rights & (1 << i):
+            key ^= bit_key
+    CASTLING_KEYS.append(key)
+
+EN_PASSANT_KEYS = [_random.getrandbits(64) for _ in range(8)]
+SIDE_KEY = _random.getrandbits(64)
+
+
+def compute_hash(bitboards, black_to_move, castling_rights, en_passant):
+    key = 0
+    for color in range(2):
+        for kind, pieces in enumerate(bitboards.pieces[color]):
+            piece_keys = PIECE_KEYS[color][kind]
+            for sq in iter_bits(pieces):
+                key ^= piece_keys[sq]
+    key ^= CASTLING_KEYS[castling_rights]
+    if en_passant is not None:
+        key ^= EN_PASSANT_KEYS[en_passant[0]]
+    if black_to_move:
+        key ^= SIDE_KEY
+    return key
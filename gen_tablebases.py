@@ -0,0 +1,72 @@
+import argparse
+import sys
+import time
+
+from game.tablebase import (TABLEBASE_DIR, Tablebases, canonical_signature, dependencies, generate,
+                            parse_signature, write_table)
+
+
+DEFAULT_TABLES = ['KQvK', 'KRvK', 'KPvK']
+
+
+def build_order(names, existing):
+    order = []
+
+    def visit(name):
+        if name in order or name in existing:
+            return
+        for dependency in dependencies(name):
+            visit(dependency)
+        order.append(name)
+
+    for name in names:
+        visit(canonical_signature(*parse_signature(name)))
+    return order
+
+
+def summarize(table):
+    wins = draws = losses = longest = 0
+    for value in table.data:
+        if value == 0:
+            draws += 1
+        elif value < 128:
+            wins += 1
+            longest = max(longest, value)
+        else:
+            losses += 1
+    return wins, draws, losses, longest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate endgame tablebases by retrograde analysis')
+    parser.add_argument('tables', nargs='*', help=f"endings to build, e.g. KQvKR (default: {' '.join(DEFAULT_TABLES)})")
+    parser.add_argument('--directory', default=TABLEBASE_DIR, help='where to write the tables')
+    parser.add_argument('--force', action='store_true', help='rebuild tables that already exist')
+    args = parser.parse_args(argv)
+
+    tablebases = Tablebases(args.directory)
+    existing = set() if args.force else tablebases.available
+    generated = {}
+
+    def get_table(name):
+        if name in generated:
+            return generated[name]
+        return tablebases.get_table(name)
+
+    def progress(name, index, size):
+        print(f"\r{name}: {100 * index // size}%", end='', file=sys.stderr)
+
+    for name in build_order(args.tables or DEFAULT_TABLES, existing):
+        start = time.perf_counter()
+        table = generate(name, get_table, progress)
+        generated[name] = table
+        path = write_table(args.directory, table)
+        wins, draws, losses, longest = summarize(table)
+        print(f"\r{name}: {table.size} positions, {wins} wins, {draws} draws/illegal, "
+              f"{losses} losses, longest mate {longest} plies, "
+              f"{time.perf_counter() - start:.1f}s -> {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,12 @@
-from ui.game_ui import ChessUI
-
-
-if __name__ == "__main__":
-    chess_ui = ChessUI()
-    chess_ui.run()
\ No newline at end of file
+import argparse
+
+from ui.game_ui import ChessUI
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Шахматы')
+    parser.add_argument('--profile', metavar='PREFIX',
+                        help='time hot paths (F3 shows them) and write PREFIX.json and PREFIX.pstats on exit')
+    args = parser.parse_args()
+    chess_ui = ChessUI(profile=args.profile)
+    chess_ui.run()
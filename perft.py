@@ -0,0 +1,132 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+from game.chess_board import ChessBoard, START_FEN
+
+
+POSITIONS = [
+    {
+        'name': 'startpos',
+        'fen': START_FEN,
+        'nodes': [20, 400, 8902, 197281, 4865609],
+        'depth': 4,
+    },
+    {
+        'name': 'kiwipete',
+        'fen': 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        'nodes': [48, 2039, 97862, 4085603],
+        'depth': 3,
+    },
+    {
+        'name': 'position3',
+        'fen': '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        'nodes': [14, 191, 2812, 43238, 674624],
+        'depth': 4,
+    },
+    {
+        'name': 'position4',
+        'fen': 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+        'nodes': [6, 264, 9467, 422333],
+        'depth': 3,
+    },
+    {
+        'name': 'position5',
+        'fen': 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+        'nodes': [44, 1486, 62379, 2103487],
+        'depth': 3,
+    },
+    {
+        'name': 'italian',
+        'fen': 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P3/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+        'nodes': [47, 1845, 81467, 3065277],
+        'depth': 3,
+    },
+]
+
+
+def run_perft(fen, depth):
+    board = ChessBoard(fen)
+    start = time.perf_counter()
+    nodes = board.perft(depth)
+    elapsed = time.perf_counter() - start
+    return nodes, elapsed
+
+
+def run_suite(positions, max_depth=None):
+    results = []
+    for position in positions:
+        depth = position['depth'] if max_depth is None else min(max_depth, len(position['nodes']))
+        for d in range(1, depth + 1):
+            nodes, elapsed = run_perft(position['fen'], d)
+            expected = position['nodes'][d - 1]
+            results.append({
+                'name': position['name'],
+                'fen': position['fen'],
+                'depth': d,
+                'nodes': nodes,
+                'expected': expected,
+                'ok': nodes == expected,
+                'seconds': round(elapsed, 6),
+                'nps': int(nodes / elapsed) if elapsed > 0 else None,
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Perft move-generation benchmark')
+    parser.add_argument('--depth', type=int, help='maximum depth for every position')
+    parser.add_argument('--position', action='append', help='run only the named position(s)')
+    parser.add_argument('--divide', metavar='FEN', help='print per-move node counts for FEN')
+    parser.add_argument('--check', action='store_true',
+                        help='recompute the hash and evaluation sums after every move and compare')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+    ChessBoard.debug_checks = args.check
+
+    if args.divide:
+        board = ChessBoard(START_FEN if args.divide == 'startpos' else args.divide)
+        counts = board.divide(args.depth or 1)
+        for move, nodes in sorted(counts.items()):
+            print(f"{move}: {nodes}")
+        print(f"total: {sum(counts.values())}")
+        return 0
+
+    positions = POSITIONS
+    if args.position:
+        positions = [p for p in POSITIONS if p['name'] in args.position]
+
+    results = run_suite(positions, args.depth)
+    total_nodes = sum(r['nodes'] for r in results)
+    total_seconds = sum(r['seconds'] for r in results)
+    report = {
+        'suite': 'perft',
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+        'total_nodes': total_nodes,
+        'total_seconds': round(total_seconds, 6),
+        'nps': int(total_nodes / total_seconds) if total_seconds > 0 else None,
+        'ok': all(r['ok'] for r in results),
+    }
+
+    for r in results:
+        status = 'ok' if r['ok'] else f"FAIL (expected {r['expected']})"
+        print(f"{r['name']:<10} depth {r['depth']}: {r['nodes']:>9} nodes "
+              f"{r['seconds']:>9.3f}s {r['nps'] or 0:>9} nps  {status}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0 if report['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from game.pgn import board_to_sans, format_game, read_games, replay
+
+
+def process(path, output=None, limit=None, progress=1000):
+    stats = {
+        'games': 0,
+        'plies': 0,
+        'errors': 0,
+        'checkmates': 0,
+        'results': Counter(),
+        'first_errors': [],
+    }
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for game in islice(read_games(f), limit):
+            stats['games'] += 1
+            try:
+                board = replay(game)
+            except ValueError as e:
+                stats['errors'] += 1
+                if len(stats['first_errors']) < 10:
+                    name = f"{game.headers.get('White', '?')} - {game.headers.get('Black', '?')}"
+                    stats['first_errors'].append(f"игра {stats['games']} ({name}): {e}")
+                continue
+
+            stats['plies'] += len(game.moves)
+            stats['results'][game.result] += 1
+            if board.is_checkmate(board.current_player):
+                stats['checkmates'] += 1
+            if output is not None:
+                if stats['games'] > 1:
+                    output.write('\n')
+                output.write(format_game(game.headers, board_to_sans(board), game.result,
+                                         board.start_fen))
+
+            if progress and stats['games'] % progress == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{stats['games']} games, {stats['games'] / elapsed:.1f} games/s",
+                      file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = round(elapsed, 6)
+    stats['games_per_second'] = round(stats['games'] / elapsed, 1) if elapsed > 0 else None
+    stats['plies_per_second'] = int(stats['plies'] / elapsed) if elapsed > 0 else None
+    stats['results'] = dict(stats['results'])
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay and re-export PGN game databases')
+    parser.add_argument('pgn', help='PGN file to read')
+    parser.add_argument('--output', help='write the replayed games as normalized PGN to this file')
+    parser.add_argument('--limit', type=int, help='stop after this many games')
+    parser.add_argument('--progress', type=int, default=1000,
+                        help='report throughput every N games (0 to disable)')
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            stats = process(args.pgn, output, args.limit, args.progress)
+    else:
+        stats = process(args.pgn, None, args.limit, args.progress)
+
+    print(json.dumps(stats, indent=2, ensure_ascii=False))
+    return 0 if not stats['errors'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
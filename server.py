@@ -0,0 +1,361 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game.chess_board import ChessBoard
+from game.engine import Engine
+from game.game_logic import ChessGame
+from game.notation import move_to_uci, parse_uci_move
+from game.save_file import read_save, write_save
+from game.tablebase import Tablebases
+
+
+IDLE_SECONDS = 300
+GAMES_DIR = os.path.join('saves', 'server')
+MAX_LINE = 64 * 1024
+
+_engine = None
+
+
+def _init_worker(hash_mb):
+    global _engine
+    _engine = Engine(time_limit=0, hash_mb=hash_mb, tablebases=Tablebases())
+
+
+def _search(fen, time_limit, max_depth):
+    return _engine.search(ChessBoard(fen), time_limit=time_limit, max_depth=max_depth)
+
+
+def game_status(game):
+    if not game.game_over:
+        return 'active'
+    return game.winner or 'draw'
+
+
+class Session:
+    def __init__(self, game, time_limit, max_depth):
+        self.game = game
+        self.ai_color = game.ai_color
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+        self.requests = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+
+class GameServer:
+    def __init__(self, directory=GAMES_DIR, workers=None, hash_mb=8, idle_seconds=IDLE_SECONDS):
+        self.directory = directory
+        self.workers = workers or os.cpu_count() or 1
+        self.hash_mb = hash_mb
+        self.idle_seconds = idle_seconds
+        self.sessions = {}
+        self.next_id = 1
+        self.pool = None
+        self.started = time.perf_counter()
+        self.stats = {'connections': 0, 'requests': 0, 'engine_moves': 0, 'engine_seconds': 0.0,
+                      'evictions': 0, 'restores': 0}
+
+    def start_pool(self):
+        context = multiprocessing.get_context('spawn')
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=context,
+                                        initializer=_init_worker, initargs=(self.hash_mb,))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def game_path(self, game_id):
+        return os.path.join(self.directory, f'game_{game_id}.chs')
+
+    def remove_file(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # Idle games are written out in the save format and dropped from memory;
+    # the session keeps only its settings and latency counters.
+    def evict(self, session_id):
+        session = self.sessions[session_id]
+        board = session.game.board
+        os.makedirs(self.directory, exist_ok=True)
+        write_save(self.game_path(session_id), board.start_fen, board.move_history)
+        session.game = None
+        self.stats['evictions'] += 1
+
+    def restore(self, session_id):
+        session = self.sessions[session_id]
+        path = self.game_path(session_id)
+        game = ChessGame(ai_color=session.ai_color)
+        try:
+            game.replay(*read_save(path))
+        except (OSError, ValueError) as e:
+            # Without its file the game cannot come back; the session goes.
+            del self.sessions[session_id]
+            raise ValueError(f"game {session_id} could not be restored: {e}") from None
+        self.remove_file(path)
+        session.game = game
+        self.stats['restores'] += 1
+        return game
+
+    async def evict_idle(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_seconds / 4))
+            deadline = time.monotonic() - self.idle_seconds
+            for session_id, session in list(self.sessions.items()):
+                if (session.game is not None and session.last_active < deadline
+                        and not session.lock.locked()):
+                    self.evict(session_id)
+
+    async def play_ai(self, session):
+        game = session.game
+        while game.is_ai_turn():
+            if game.play_book_move():
+                continue
+            start = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, _search, game.board.get_fen(),
+                                                session.time_limit, session.max_depth)
+            self.stats['engine_moves'] += 1
+            self.stats['engine_seconds'] += time.perf_counter() - start
+            if not game.apply_search_result(result):
+                break
+
+    def describe(self, session_id, game, last_moves=0):
+        board = game.board
+        reply = {'ok': True, 'game': session_id, 'fen': board.get_fen(),
+                 'turn': board.current_player, 'status': game_status(game)}
+        if game.tablebase_result is not None:
+            winner, plies = game.tablebase_result
+            reply['tablebase'] = {'winner': winner, 'plies': plies}
+        if last_moves:
+            reply['moves'] = [move_to_uci(*move) for move in board.move_history[-last_moves:]]
+        return reply
+
+    def create(self, request):
+        ai_color = request.get('ai')
+        if ai_color not in (None, 'white', 'black'):
+            raise ValueError(f"unknown color {ai_color}")
+        time_limit = float(request.get('time', 0.1))
+        depth = request.get('depth')
+        if depth is not None:
+            depth = int(depth)
+        game = ChessGame(ai_color=ai_color)
+        if 'fen' in request:
+            # load_fen checks the FEN before the board is touched.
+            game.replay(request['fen'], [])
+        session_id = self.next_id
+        self.next_id += 1
+        self.sessions[session_id] = Session(game, time_limit, depth)
+        return session_id
+
+    # Requests: {"op": "new", "ai": color, "fen": ..., "time": s, "depth": n},
+    # {"op": "move", "game": id, "move": "e2e4"}, and "state", "legal", "close"
+    # and "stats". Replies carry "ok", the FEN, the side to move, the status
+    # (active, draw or the winner's color), the plies just played and, once
+    # the tablebases decide the ending, "tablebase": {"winner", "plies"}.
+    async def handle(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+        op = request.get('op')
+        if op == 'stats':
+            return self.report()
+        if op == 'new':
+            session_id = self.create(request)
+        else:
+            session_id = request.get('game')
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ValueError(f"no game {session_id}")
+
+        start = time.perf_counter()
+        async with session.lock:
+            if op == 'close':
+                del self.sessions[session_id]
+                if session.game is None:
+                    self.remove_file(self.game_path(session_id))
+                return {'ok': True, 'game': session_id}
+            game = session.game or self.restore(session_id)
+            plies = len(game.board.move_history)
+            if op == 'new':
+                await self.play_ai(session)
+                reply = self.describe(session_id, game, len(game.board.move_history) - plies)
+            elif op == 'move':
+                if game.game_over:
+                    raise ValueError("game is over")
+                if game.is_ai_turn():
+                    raise ValueError("not your turn")
+                if not game.board.move_piece(*parse_uci_move(request['move'])):
+                    raise ValueError(f"illegal move {request['move']}")
+                game.update_game_over()
+                await self.play_ai(session)
+                reply = self.describe(session_id, game, len(game.board.move_history) - plies)
+            elif op == 'state':
+                reply = self.describe(session_id, game, plies)
+            elif op == 'legal':
+                reply = self.describe(session_id, game)
+                reply['legal'] = [move_to_uci(*move) for move in game.board.generate_legal_moves()]
+            else:
+                raise ValueError(f"unknown op {op}")
+        elapsed = time.perf_counter() - start
+        session.last_active = time.monotonic()
+        session.requests += 1
+        session.latency += elapsed
+        session.max_latency = max(session.max_latency, elapsed)
+        return reply
+
+    async def serve_client(self, reader, writer):
+        self.stats['connections'] += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.stats['requests'] += 1
+                request = {}
+                try:
+                    request = json.loads(line)
+                    reply = await self.handle(request)
+                except (ValueError, KeyError, TypeError, AttributeError, IndexError, OSError) as e:
+                    reply = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                if isinstance(request, dict) and 'id' in request:
+                    reply['id'] = request['id']
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        sessions = list(self.sessions.values())
+        requests = sum(session.requests for session in sessions)
+        latency = sum(session.latency for session in sessions)
+        cores = os.cpu_count() or 1
+        active = sum(1 for session in sessions if session.game is not None)
+        return {
+            'ok': True,
+            'sessions': len(sessions),
+            'in_memory': active,
+            'evicted': len(sessions) - active,
+            'sessions_per_core': round(len(sessions) / cores, 1),
+            'requests': self.stats['requests'],
+            'requests_per_second': round(self.stats['requests'] / elapsed, 1) if elapsed > 0 else None,
+            'latency_ms': round(latency / requests * 1000, 3) if requests else None,
+            'max_latency_ms': round(max((session.max_latency for session in sessions), default=0)
+                                    * 1000, 3),
+            'engine_moves': self.stats['engine_moves'],
+            'engine_ms': (round(self.stats['engine_seconds'] / self.stats['engine_moves'] * 1000, 3)
+                          if self.stats['engine_moves'] else None),
+            'evictions': self.stats['evictions'],
+            'restores': self.stats['restores'],
+            'workers': self.workers,
+            'cores': cores,
+        }
+
+
+async def serve(host, port, server):
+    server.start_pool()
+    listener = await asyncio.start_server(server.serve_client, host, port, limit=MAX_LINE)
+    evictor = asyncio.create_task(server.evict_idle())
+    address = listener.sockets[0].getsockname()
+    print(f"listening on {address[0]}:{address[1]}", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        evictor.cancel()
+        server.close()
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def bench(games, plies, connections, seed=1):
+    # Plays random games against the engine over real sockets on localhost;
+    # every game is evicted to disk and restored once along the way.
+    directory = tempfile.mkdtemp(prefix='chess-server-')
+    server = GameServer(directory, idle_seconds=IDLE_SECONDS)
+    server.start_pool()
+    listener = await asyncio.start_server(server.serve_client, '127.0.0.1', 0, limit=MAX_LINE)
+    port = listener.sockets[0].getsockname()[1]
+    rng = random.Random(seed)
+    errors = []
+
+    async def client(count):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=MAX_LINE)
+        ids = []
+        for _ in range(count):
+            reply = await request(reader, writer, {'op': 'new', 'ai': 'black', 'depth': 1})
+            ids.append(reply['game'])
+        for ply in range(plies):
+            for game_id in ids:
+                if ply == plies // 2 and server.sessions[game_id].game is not None:
+                    server.evict(game_id)
+                reply = await request(reader, writer, {'op': 'legal', 'game': game_id})
+                if reply['status'] != 'active':
+                    continue
+                move = rng.choice(reply['legal'])
+                reply = await request(reader, writer, {'op': 'move', 'game': game_id, 'move': move})
+                if not reply['ok']:
+                    errors.append(reply['error'])
+        writer.close()
+
+    start = time.perf_counter()
+    per_client = [games // connections + (i < games % connections) for i in range(connections)]
+    await asyncio.gather(*(client(count) for count in per_client if count))
+    elapsed = time.perf_counter() - start
+    report = server.report()
+    report.update({'suite': 'server', 'games': games, 'plies': plies, 'connections': connections,
+                   'seconds': round(elapsed, 6), 'errors': errors[:10]})
+    listener.close()
+    await listener.wait_closed()
+    server.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless multi-game server, one JSON request per line')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, help='engine processes (default: CPU count)')
+    parser.add_argument('--hash', type=int, default=8, help='transposition table size per worker, MB')
+    parser.add_argument('--idle', type=float, default=IDLE_SECONDS,
+                        help='seconds before an idle game is written to disk')
+    parser.add_argument('--directory', default=GAMES_DIR, help='where evicted games are kept')
+    parser.add_argument('--bench', type=int, metavar='GAMES',
+                        help='play GAMES random games against a local server and print the report')
+    parser.add_argument('--plies', type=int, default=10, help='moves per game in --bench')
+    parser.add_argument('--connections', type=int, default=10, help='client connections in --bench')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        report = asyncio.run(bench(args.bench, args.plies, args.connections))
+        print(json.dumps(report, indent=2))
+        return 0 if not report['errors'] else 1
+
+    server = GameServer(args.directory, args.workers, args.hash, args.idle)
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The game and the scripts at the repository root are imported as top-level
+# modules, the way the scripts themselves do.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,34 @@
+import analyze
+
+
+PGN = '''[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. f3 e5 2. g4 Qh4# 1-0
+
+[White "C"]
+[Black "D"]
+[FEN "garbage"]
+[Result "*"]
+
+1. e4 *
+
+[White "E"]
+[Black "F"]
+[Result "*"]
+
+1. e4 e5 *
+'''
+
+
+def test_bad_fen_tag_fails_only_its_game(tmp_path):
+    path = tmp_path / 'games.pgn'
+    path.write_text(PGN, encoding='utf-8')
+    report = analyze.run(str(path), workers=1, progress=False)
+    assert report['games'] == 3
+    assert report['errors'] == 1
+    first, bad, last = report['per_game']
+    assert first['outcome'] == 'checkmate' and first['error'] is None
+    assert bad['error'] and bad['plies'] == 0
+    assert last['plies'] == 2 and last['error'] is None
@@ -0,0 +1,64 @@
+import pytest
+
+from bench_eval import random_positions
+from game.chess_board import ChessBoard
+from game.evaluation import evaluate_position, evaluate_tapered, evaluate_terms
+
+pytest.importorskip('numpy')
+
+from game.batch_eval import (evaluate_batch, evaluate_tapered_batch, evaluate_terms_packed,  # noqa: E402
+                             pack_positions)
+
+
+# Positions where one side has what the other lacks, with the pawn terms
+# the scalar reference gives them from White's side.
+PAWN_POSITIONS = [
+    ('4k3/pp6/8/8/8/P7/PP6/4K3 w - - 0 1', -10),          # doubled a-pawns
+    ('4k3/ppp5/8/8/8/8/P1P5/4K3 w - - 0 1', -30),         # isolated a- and c-pawns
+    ('4k3/8/8/3P4/4P3/8/8/4K3 w - - 0 1', 55),            # passed d- and e-pawns
+    ('4k3/8/8/8/4p3/4p3/8/4K3 b - - 0 1', -55),           # black: doubled, isolated, passed
+]
+MOBILITY_POSITIONS = [
+    '4k3/8/8/3N4/8/8/1B6/R3K3 w - - 0 1',
+    'q3k3/8/2n5/8/8/8/8/4K2R b - - 0 1',
+    'r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3',
+]
+
+
+def test_batch_scores_equal_the_scalar_evaluation():
+    boards = random_positions(500, 80, seed=3)
+    assert evaluate_batch(boards).tolist() == [evaluate_position(board) for board in boards]
+
+
+def test_tapered_batch_scores_equal_the_engine_evaluation():
+    boards = random_positions(500, 80, seed=3)
+    assert evaluate_tapered_batch(boards).tolist() == [evaluate_tapered(board) for board in boards]
+
+
+def test_batch_of_one_and_empty_batch():
+    [board] = random_positions(1, 40, seed=4)
+    assert evaluate_batch([board]).tolist() == [evaluate_position(board)]
+    assert evaluate_batch([]).tolist() == []
+
+
+def assert_terms_match(boards):
+    batch = evaluate_terms_packed(pack_positions(boards))
+    for i, board in enumerate(boards):
+        scalar = evaluate_terms(board)
+        assert {name: int(values[i]) for name, values in batch.items()} == scalar, board.get_fen()
+
+
+def test_batch_terms_equal_the_scalar_terms():
+    assert_terms_match(random_positions(300, 80, seed=6))
+
+
+def test_pawn_structure_terms():
+    boards = [ChessBoard(fen) for fen, _ in PAWN_POSITIONS]
+    assert [evaluate_terms(board)['pawns'] for board in boards] == [pawns for _, pawns in PAWN_POSITIONS]
+    assert_terms_match(boards)
+
+
+def test_mobility_terms():
+    boards = [ChessBoard(fen) for fen in MOBILITY_POSITIONS]
+    assert all(evaluate_terms(board)['mobility'] for board in boards)
+    assert_terms_match(boards)
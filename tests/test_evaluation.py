@@ -0,0 +1,29 @@
+import random
+
+from game.chess_board import ChessBoard, PROMOTIONS
+from game.evaluation import compute_tapered, evaluate_tapered, tapered_score
+from perft import POSITIONS
+
+
+def test_running_sums_match_a_recompute_through_make_and_unmake():
+    rng = random.Random(11)
+    for position in POSITIONS:
+        board = ChessBoard(position['fen'])
+        start = (board.mg, board.eg, board.phase)
+        assert start == compute_tapered(board.bitboards)
+        for _ in range(20):
+            played = 0
+            for _ in range(rng.randint(1, 12)):
+                moves = board.generate_legal_moves()
+                if not moves:
+                    break
+                board.make_move(*rng.choice(moves), rng.choice(PROMOTIONS))
+                played += 1
+                assert (board.mg, board.eg, board.phase) == compute_tapered(board.bitboards)
+                assert evaluate_tapered(board) == tapered_score(*compute_tapered(board.bitboards))
+            for _ in range(rng.randint(0, played)):
+                board.unmake_move()
+                assert (board.mg, board.eg, board.phase) == compute_tapered(board.bitboards)
+        while board.move_history:
+            board.unmake_move()
+        assert (board.mg, board.eg, board.phase) == start
@@ -0,0 +1,32 @@
+import random
+
+from game.chess_board import ChessBoard, PROMOTIONS
+from perft import POSITIONS
+
+
+def test_piece_moves_are_the_board_legal_moves():
+    rng = random.Random(5)
+    for position in POSITIONS:
+        board = ChessBoard(position['fen'])
+        for _ in range(30):
+            for y, row in enumerate(board.board):
+                for x, piece in enumerate(row):
+                    if piece is not None and piece.color == board.current_player:
+                        assert sorted(piece.get_possible_moves(board, (x, y))) == \
+                            sorted(board.get_legal_moves((x, y)))
+            moves = board.generate_legal_moves()
+            if not moves:
+                break
+            board.make_move(*rng.choice(moves), rng.choice(PROMOTIONS))
+
+
+def test_king_does_not_castle_without_rook_or_through_check():
+    # The h1 rook is gone although the castling right is still set.
+    board = ChessBoard('r3k2r/8/8/8/8/8/8/R3K3 w KQkq - 0 1')
+    king = board.get_piece((4, 7))
+    moves = king.get_possible_moves(board, (4, 7))
+    assert (6, 7) not in moves
+    assert (2, 7) in moves
+    # f1 is covered by the bishop on c4.
+    board = ChessBoard('r3k2r/8/8/8/2b5/8/8/R3K2R w KQkq - 0 1')
+    assert (6, 7) not in board.get_piece((4, 7)).get_possible_moves(board, (4, 7))
@@ -0,0 +1,32 @@
+from game.chess_board import ChessBoard
+from game.game_logic import ChessGame
+from game.profiling import Profiler
+
+
+START = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+
+def test_game_targets_cover_the_move_path():
+    profiler = Profiler()
+    profiler.enable()
+    try:
+        game = ChessGame()
+        game.select_piece((4, 6))
+        game.move_selected_piece((4, 4))
+    finally:
+        profiler.disable()
+    assert {name for name, timer in profiler.timers.items() if timer.calls} >= {
+        'ChessBoard.legal_moves', 'Bitboards.legal_moves', 'LegalMoveCache.get',
+        'ChessBoard.make_move', 'ChessGame.move_selected_piece', 'ChessGame.update_game_over'}
+
+
+def test_slowest_calls_record_the_position_before_the_call():
+    profiler = Profiler()
+    profiler.enable([(ChessBoard, 'make_move', lambda args: args[0].get_fen())])
+    try:
+        board = ChessBoard(START)
+        board.make_move((4, 6), (4, 4))
+    finally:
+        profiler.disable()
+    [(_, position)] = profiler.timers['ChessBoard.make_move'].slowest
+    assert position == START
@@ -0,0 +1,60 @@
+import pytest
+
+from game.bitboard import KING, KNIGHT, PAWN, QUEEN, ROOK
+from game.book import ENTRY, OpeningBook, polyglot_key
+from game.chess_board import ChessBoard
+from game.game_logic import ChessGame
+
+
+FEN = 'k7/4P3/8/8/8/8/8/4K3 w - - 0 1'
+FROM, TO = (4, 1), (4, 0)
+
+
+@pytest.mark.parametrize('promotion', [PAWN, KING, 6, 7])
+def test_move_piece_rejects_bad_promotions(promotion):
+    board = ChessBoard(FEN)
+    assert not board.move_piece(FROM, TO, promotion)
+    assert board.get_fen() == FEN
+
+
+def test_move_piece_promotes_to_the_chosen_piece():
+    board = ChessBoard(FEN)
+    assert board.move_piece(FROM, TO, KNIGHT)
+    assert board.get_piece(TO).kind == KNIGHT
+    board = ChessBoard(FEN)
+    assert board.move_piece(FROM, TO)
+    assert board.get_piece(TO).kind == QUEEN
+
+
+def test_make_move_refuses_a_king_promotion():
+    board = ChessBoard(FEN)
+    with pytest.raises(ValueError):
+        board.make_move(FROM, TO, KING)
+    assert board.get_fen() == FEN
+
+
+def test_game_rejects_bad_promotions():
+    game = ChessGame(book_path=None)
+    game.replay(FEN, [])
+    for promotion in (PAWN, KING, 7):
+        assert game.select_piece(FROM)
+        assert not game.move_selected_piece(TO, promotion)
+    assert game.board.get_fen() == FEN
+    assert game.move_selected_piece(TO, ROOK)
+    assert game.board.get_piece(TO).kind == ROOK
+    with pytest.raises(ValueError):
+        game.replay(FEN, [(FROM, TO, 6)])
+
+
+def test_book_skips_entries_with_a_bad_promotion(tmp_path):
+    board = ChessBoard(FEN)
+    e7e8 = 4 | (7 << 3) | (4 << 6) | (6 << 9)
+    path = tmp_path / 'book.bin'
+    key = polyglot_key(board)
+    path.write_bytes(b''.join(ENTRY.pack(key, e7e8 | (promotion << 12), 1, 0)
+                              for promotion in (1, 5, 6, 7)))
+    book = OpeningBook(str(path))
+    try:
+        assert book.get_moves(board) == [(FROM, TO, KNIGHT, 1)]
+    finally:
+        book.close()
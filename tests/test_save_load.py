@@ -0,0 +1,45 @@
+import os
+import shutil
+
+from game import game_logic
+from game.game_logic import ChessGame
+
+
+LEGACY_SAVE = os.path.join(os.path.dirname(__file__), '..', 'saves', 'save_1.json')
+
+
+def count_game_over_checks(monkeypatch):
+    calls = []
+    original = ChessGame.update_game_over
+
+    def update_game_over(self):
+        calls.append(self.board.get_fen())
+        return original(self)
+
+    monkeypatch.setattr(ChessGame, 'update_game_over', update_game_over)
+    return calls
+
+
+def test_load_checks_game_over_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(game_logic, 'SAVE_DIR', str(tmp_path))
+    game = ChessGame(book_path=None)
+    for move in [((5, 6), (5, 5)), ((4, 1), (4, 3)), ((6, 6), (6, 4)), ((3, 0), (7, 4))]:
+        assert game.select_piece(move[0])
+        assert game.move_selected_piece(move[1])
+    assert game.game_over
+    game.save_game(1)
+
+    calls = count_game_over_checks(monkeypatch)
+    loaded = ChessGame(book_path=None)
+    assert loaded.load_game(1)
+    assert len(calls) == 1
+    assert loaded.game_over and loaded.winner == 'black'
+
+
+def test_legacy_load_checks_game_over_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(game_logic, 'SAVE_DIR', str(tmp_path))
+    shutil.copy(LEGACY_SAVE, game_logic.legacy_slot_path(str(tmp_path), 1))
+    calls = count_game_over_checks(monkeypatch)
+    game = ChessGame(book_path=None)
+    assert game.load_game(1)
+    assert len(calls) == 1
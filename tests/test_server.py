@@ -0,0 +1,78 @@
+import asyncio
+import os
+
+import server
+
+
+async def _session(directory, script):
+    game_server = server.GameServer(str(directory))
+    listener = await asyncio.start_server(game_server.serve_client, '127.0.0.1', 0,
+                                          limit=server.MAX_LINE)
+    port = listener.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=server.MAX_LINE)
+
+    async def send(message):
+        return await server.request(reader, writer, message)
+
+    try:
+        return await script(game_server, send)
+    finally:
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        game_server.close()
+
+
+def run(directory, script):
+    return asyncio.run(_session(directory, script))
+
+
+def test_bad_moves_get_error_replies(tmp_path):
+    async def script(game_server, send):
+        game = (await send({'op': 'new'}))['game']
+        replies = [await send({'op': 'move', 'game': game, 'move': move})
+                   for move in ['e0e4', 'e2e4x', 'i2i4', 'e2', 'e2e4qq', '', 123, 'e2e5']]
+        after = await send({'op': 'move', 'game': game, 'move': 'e2e4'})
+        return replies, after
+
+    replies, after = run(tmp_path, script)
+    assert all(not reply['ok'] and reply['error'] for reply in replies)
+    assert after['ok'] and after['moves'] == ['e2e4']
+
+
+def test_bad_fen_gets_an_error_reply(tmp_path):
+    async def script(game_server, send):
+        replies = [await send({'op': 'new', 'fen': fen})
+                   for fen in ['garbage', '8/8/8/8/8/8/8/8 w - - 0 1',
+                               'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq - 0 1', 42]]
+        replies.append(await send({'op': 'new', 'depth': 'deep'}))
+        return replies, await send({'op': 'stats'}), await send({'op': 'new'})
+
+    replies, stats, fresh = run(tmp_path, script)
+    assert all(not reply['ok'] for reply in replies)
+    assert stats['sessions'] == 0
+    assert fresh['ok']
+
+
+def test_double_close_and_missing_save(tmp_path):
+    async def script(game_server, send):
+        first = (await send({'op': 'new'}))['game']
+        second = (await send({'op': 'new'}))['game']
+        closes = [await send({'op': 'close', 'game': first}) for _ in range(2)]
+
+        # An evicted game whose file has gone: close still works, and a
+        # request that needs the game gets an error and drops the session.
+        game_server.evict(second)
+        os.remove(game_server.game_path(second))
+        lost = await send({'op': 'state', 'game': second})
+        third = (await send({'op': 'new'}))['game']
+        game_server.evict(third)
+        os.remove(game_server.game_path(third))
+        closed = await send({'op': 'close', 'game': third})
+        return closes, lost, closed, await send({'op': 'stats'})
+
+    closes, lost, closed, stats = run(tmp_path, script)
+    assert closes[0]['ok'] and not closes[1]['ok']
+    assert not lost['ok']
+    assert closed['ok']
+    assert stats['ok'] and stats['sessions'] == 0
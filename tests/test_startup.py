@@ -0,0 +1,49 @@
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bench_startup import IMPORT_BUDGET_MS
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules the search core must not pay for: the UI toolkit, numpy and the
+# mmap-backed opening book and tablebase readers.
+HEAVY = {'numpy', 'pygame', 'mmap', 'game.book', 'game.tablebase'}
+GAME_MODULES = sorted('game.' + os.path.splitext(os.path.basename(path))[0]
+                      for path in glob.glob(os.path.join(ROOT, 'game', '*.py')))
+
+
+def import_times(module):
+    # {module: cumulative microseconds} of a cold import in a fresh interpreter.
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        fields = line[len('import time:'):].split('|')
+        if line.startswith('import time:') and len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+@pytest.mark.parametrize('module', ['game.chess_board', 'game.engine'])
+def test_core_imports_no_heavy_modules(module):
+    times = import_times(module)
+    assert module in times
+    assert not HEAVY & set(times)
+
+
+@pytest.mark.parametrize('module', GAME_MODULES)
+def test_game_modules_leave_pygame_and_numpy_out(module):
+    times = import_times(module)
+    assert 'pygame' not in times
+    if module != 'game.batch_eval':
+        assert 'numpy' not in times
+
+
+def test_board_import_fits_the_budget():
+    # Best of three, like bench_startup, to keep scheduler noise out.
+    best = min(import_times('game.chess_board')['game.chess_board'] for _ in range(3))
+    assert best <= IMPORT_BUDGET_MS * 1000
@@ -0,0 +1,49 @@
+import pytest
+
+from game import game_logic
+from game.game_logic import ChessGame
+from game.tablebase import Tablebases, generate, write_table
+
+
+@pytest.fixture(scope='module')
+def tablebases(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('tablebases')
+    write_table(str(directory), generate('KQvK', lambda name: None))
+    return Tablebases(str(directory))
+
+
+@pytest.fixture
+def game(tablebases, monkeypatch):
+    monkeypatch.setattr(game_logic, 'tablebases', tablebases)
+    return ChessGame()
+
+
+def test_won_ending_is_reported(game):
+    game.replay('7k/8/5K2/8/8/8/8/6Q1 w - - 0 1', [])
+    assert not game.game_over
+    assert game.tablebase_result == ('white', 1)
+
+    game.replay('7k/8/5K2/8/8/8/8/6Q1 b - - 0 1', [])
+    winner, plies = game.tablebase_result
+    assert winner == 'white' and plies > 1
+
+
+def test_drawn_ending_ends_the_game(game):
+    # Black takes the queen.
+    game.replay('8/8/8/8/8/8/5Qk1/K7 b - - 0 1', [])
+    assert game.game_over and game.winner is None
+    assert game.tablebase_result is None
+
+
+def test_positions_outside_the_tables_are_left_alone(game):
+    game.replay('7k/8/5K2/8/8/8/8/5RR1 w - - 0 1', [])
+    assert not game.game_over
+    assert game.tablebase_result is None
+
+
+def test_undo_probes_the_earlier_position(game):
+    game.replay('7k/8/5K2/8/8/8/8/6Q1 b - - 0 1', [])
+    assert game.board.move_piece((7, 0), (7, 1))
+    game.update_game_over()
+    game.undo_move()
+    assert game.tablebase_result[0] == 'white'
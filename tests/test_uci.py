@@ -0,0 +1,42 @@
+import time
+
+import uci
+
+
+def outputs(capsys):
+    return capsys.readouterr().out.splitlines()
+
+
+def test_stop_right_after_go_infinite_gives_bestmove(capsys):
+    engine = uci.UCIEngine()
+    engine.handle('position startpos')
+    engine.handle('go infinite')
+    engine.handle('stop')
+    assert engine.thread is None
+    assert any(line.startswith('bestmove ') for line in outputs(capsys))
+
+
+def test_go_infinite_waits_for_stop(capsys):
+    # Mate in one is found at once; the answer still waits for stop.
+    engine = uci.UCIEngine()
+    engine.handle('position fen 6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+    engine.handle('go infinite depth 2')
+    time.sleep(0.3)
+    assert not any(line.startswith('bestmove') for line in outputs(capsys))
+    engine.handle('stop')
+    assert 'bestmove a1a8' in outputs(capsys)
+
+
+def test_bad_input_is_reported_and_ignored(capsys):
+    engine = uci.UCIEngine()
+    for line in ['position startpos moves e2e4 e0e9', 'position fen garbage',
+                 'position startpos moves e7e5x', 'go depth', 'go wtime abc depth 1',
+                 'setoption name Hash value lots']:
+        assert engine.handle(line)
+        engine.wait()
+    assert any(line.startswith('info string') for line in outputs(capsys))
+    assert engine.handle('position startpos moves e2e4')
+    assert engine.board.get_fen().startswith('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b')
+    assert engine.handle('isready')
+    assert outputs(capsys) == ['readyok']
+    assert not engine.handle('quit')
@@ -0,0 +1,222 @@
+import os
+import sys
+import threading
+
+from game.bitboard import QUEEN
+from game.book import OpeningBook
+from game.chess_board import ChessBoard, START_FEN
+from game.engine import Engine, MATE_SCORE, MATE_BOUND
+from game.notation import move_to_uci, parse_uci_move
+from game.tablebase import Tablebases
+
+
+ENGINE_NAME = 'Chess'
+ENGINE_AUTHOR = 'Chess authors'
+
+
+def send(line):
+    sys.stdout.write(line + '\n')
+    sys.stdout.flush()
+
+
+def format_score(score):
+    if score >= MATE_BOUND:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"mate -{(MATE_SCORE + score + 1) // 2}"
+    return f"cp {score}"
+
+
+def engine_move_to_uci(board, move):
+    # The engine only searches queen promotions.
+    from_pos, to_pos = move
+    return move_to_uci(from_pos, to_pos, QUEEN if board.is_promotion(from_pos, to_pos) else None)
+
+
+def format_info(info, board):
+    move = engine_move_to_uci(board, info['move'])
+    return (f"info depth {info['depth']} score {format_score(info['score'])} "
+            f"nodes {info['nodes']} nps {info['nps']} tbhits {info['tbhits']} "
+            f"time {int(info['seconds'] * 1000)} pv {move}")
+
+
+def parse_go(tokens, color):
+    params = {}
+    i = 0
+    while i < len(tokens):
+        name = tokens[i]
+        if name == 'infinite':
+            params['infinite'] = True
+            i += 1
+        elif i + 1 < len(tokens):
+            try:
+                params[name] = int(tokens[i + 1])
+            except ValueError:
+                pass
+            i += 2
+        else:
+            i += 1
+
+    if params.get('infinite'):
+        return 0, None
+    if 'movetime' in params:
+        return params['movetime'] / 1000, params.get('depth')
+    remaining = params.get('wtime' if color == 'white' else 'btime')
+    if remaining is None:
+        return (0 if 'depth' in params else 1.0), params.get('depth')
+    increment = params.get('winc' if color == 'white' else 'binc', 0)
+    moves_to_go = params.get('movestogo', 30)
+    budget = remaining / max(moves_to_go, 1) + increment * 0.8
+    budget = min(budget, remaining * 0.5)
+    return max(budget, 10) / 1000, params.get('depth')
+
+
+class UCIEngine:
+    def __init__(self):
+        self.board = ChessBoard()
+        self.hash_mb = 16
+        self.tablebases = Tablebases()
+        self.engine = Engine(hash_mb=self.hash_mb, tablebases=self.tablebases)
+        self.book = None
+        self.thread = None
+        self.stop_event = None
+        self.infinite = False
+
+    def handle(self, line):
+        tokens = line.split()
+        if not tokens:
+            return True
+        try:
+            return self.dispatch(tokens)
+        except (ValueError, IndexError, KeyError) as e:
+            # Bad input from the GUI is reported and skipped; the engine
+            # keeps running.
+            send(f"info string error in '{line}': {e}")
+            return True
+
+    def dispatch(self, tokens):
+        command = tokens[0]
+
+        if command == 'uci':
+            send(f"id name {ENGINE_NAME}")
+            send(f"id author {ENGINE_AUTHOR}")
+            send(f"option name Hash type spin default {self.hash_mb} min 1 max 1024")
+            send("option name BookFile type string default <empty>")
+            send("uciok")
+        elif command == 'isready':
+            send("readyok")
+        elif command == 'setoption':
+            self.set_option(tokens[1:])
+        elif command == 'ucinewgame':
+            self.wait()
+            self.board = ChessBoard()
+            self.engine.table.clear()
+        elif command == 'position':
+            self.wait()
+            self.set_position(tokens[1:])
+        elif command == 'go':
+            self.wait()
+            self.go(tokens[1:])
+        elif command == 'stop':
+            self.stop()
+        elif command == 'd':
+            send(self.board.get_fen())
+        elif command == 'quit':
+            self.stop()
+            return False
+        return True
+
+    def set_option(self, tokens):
+        if 'name' not in tokens or 'value' not in tokens:
+            return
+        name = ' '.join(tokens[tokens.index('name') + 1:tokens.index('value')])
+        value = ' '.join(tokens[tokens.index('value') + 1:])
+        if name.lower() == 'hash':
+            self.hash_mb = max(1, int(value))
+            self.engine = Engine(hash_mb=self.hash_mb, tablebases=self.tablebases)
+        elif name.lower() == 'bookfile':
+            if self.book is not None:
+                self.book.close()
+            self.book = None
+            if value and value != '<empty>':
+                if os.path.exists(value):
+                    self.book = OpeningBook(value)
+                else:
+                    send(f"info string book not found: {value}")
+
+    def set_position(self, tokens):
+        if not tokens:
+            return
+        if tokens[0] == 'startpos':
+            fen = START_FEN
+            rest = tokens[1:]
+        elif tokens[0] == 'fen':
+            end = tokens.index('moves') if 'moves' in tokens else len(tokens)
+            fen = ' '.join(tokens[1:end])
+            rest = tokens[end:]
+        else:
+            return
+        self.board = ChessBoard(fen)
+        if rest and rest[0] == 'moves':
+            for text in rest[1:]:
+                try:
+                    legal = self.board.move_piece(*parse_uci_move(text))
+                except (ValueError, IndexError):
+                    legal = False
+                if not legal:
+                    send(f"info string illegal move {text}")
+                    break
+
+    def go(self, tokens):
+        move = self.book.choose(self.board) if self.book is not None else None
+        if move is not None:
+            send(f"bestmove {move_to_uci(*move)}")
+            return
+        time_limit, max_depth = parse_go(tokens, self.board.current_player)
+        # A fresh event per search: a stop that comes in before the search
+        # thread gets going is still seen by it.
+        self.stop_event = threading.Event()
+        self.engine.stop_event = self.stop_event
+        self.infinite = 'infinite' in tokens
+        self.thread = threading.Thread(target=self.search,
+                                       args=(time_limit, max_depth, self.infinite, self.stop_event),
+                                       daemon=True)
+        self.thread.start()
+
+    def search(self, time_limit, max_depth, infinite, stop_event):
+        result = self.engine.search(self.board, time_limit=time_limit, max_depth=max_depth,
+                                    on_iteration=lambda info: send(format_info(info, self.board)))
+        if infinite:
+            # Under go infinite the answer waits for stop, even after a mate
+            # or the last depth.
+            stop_event.wait()
+        if result['move'] is None:
+            send("bestmove 0000")
+        else:
+            send(f"bestmove {engine_move_to_uci(self.board, result['move'])}")
+
+    def stop(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+        self.wait()
+
+    def wait(self):
+        if self.thread is not None:
+            if self.infinite:
+                # Nothing but a stop ends an infinite search, and commands are
+                # read on this thread, so a command that needs the board stops it.
+                self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+
+def main():
+    uci = UCIEngine()
+    for line in sys.stdin:
+        if not uci.handle(line.strip()):
+            break
+    uci.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import json
+import os
+
+import pygame
+
+
+IMAGES_DIR = os.path.join('assets', 'images')
+FONTS_DIR = os.path.join('assets', 'fonts')
+ATLAS_PATH = os.path.join(IMAGES_DIR, 'pieces_atlas.png')
+ATLAS_INDEX = os.path.join(IMAGES_DIR, 'pieces_atlas.json')
+FONT_NAME = 'ui.ttf'
+
+PIECE_FILES = {
+    'Pw': 'white_pawn.png', 'Rw': 'white_rook.png', 'Hw': 'white_knight.png',
+    'Bw': 'white_bishop.png', 'Qw': 'white_queen.png', 'Kw': 'white_king.png',
+    'Pb': 'black_pawn.png', 'Rb': 'black_rook.png', 'Hb': 'black_knight.png',
+    'Bb': 'black_bishop.png', 'Qb': 'black_queen.png', 'Kb': 'black_king.png',
+}
+ATLAS_COLUMNS = 6
+
+_fonts = {}
+
+
+def build_atlas(images_dir=IMAGES_DIR, atlas_path=ATLAS_PATH, index_path=ATLAS_INDEX):
+    images = {key: pygame.image.load(os.path.join(images_dir, name))
+              for key, name in PIECE_FILES.items()}
+    cell_width = max(image.get_width() for image in images.values())
+    cell_height = max(image.get_height() for image in images.values())
+    rows = (len(images) + ATLAS_COLUMNS - 1) // ATLAS_COLUMNS
+    atlas = pygame.Surface((cell_width * ATLAS_COLUMNS, cell_height * rows), pygame.SRCALPHA)
+    index = {}
+    for i, (key, image) in enumerate(images.items()):
+        x = (i % ATLAS_COLUMNS) * cell_width
+        y = (i // ATLAS_COLUMNS) * cell_height
+        atlas.blit(image, (x, y))
+        index[key] = [x, y, image.get_width(), image.get_height()]
+    pygame.image.save(atlas, atlas_path)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    return atlas_path
+
+
+def _atlas_stale(images_dir, atlas_path, index_path):
+    if not (os.path.exists(atlas_path) and os.path.exists(index_path)):
+        return True
+    built = min(os.path.getmtime(atlas_path), os.path.getmtime(index_path))
+    return any(os.path.getmtime(os.path.join(images_dir, name)) > built
+               for name in PIECE_FILES.values())
+
+
+def load_piece_images(images_dir=IMAGES_DIR, atlas_path=ATLAS_PATH, index_path=ATLAS_INDEX):
+    # One PNG decode for all twelve pieces. The atlas is normally made by
+    # build_assets.py; a checkout without it (or with newer piece images)
+    # gets it rebuilt here once.
+    if _atlas_stale(images_dir, atlas_path, index_path):
+        try:
+            build_atlas(images_dir, atlas_path, index_path)
+        except (OSError, pygame.error):
+            return {key: pygame.image.load(os.path.join(images_dir, name)).convert_alpha()
+                    for key, name in PIECE_FILES.items()}
+    atlas = pygame.image.load(atlas_path).convert_alpha()
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    return {key: atlas.subsurface(pygame.Rect(rect)) for key, rect in index.items()}
+
+
+def get_font(size):
+    # A font shipped in assets/fonts wins; otherwise pygame's bundled default.
+    # Either way no system font scan happens.
+    font = _fonts.get(size)
+    if font is None:
+        path = os.path.join(FONTS_DIR, FONT_NAME)
+        font = pygame.font.Font(path if os.path.exists(path) else None, size)
+        _fonts[size] = font
+    return font
+
+
+def draw_board(cell_size, light_color, dark_color):
+    surface = pygame.Surface((cell_size * 8, cell_size * 8))
+    surface.fill(light_color)
+    for y in range(8):
+        for x in range(8):
+            if (x + y) % 2:
+                surface.fill(dark_color, (x * cell_size, y * cell_size, cell_size, cell_size))
+    return surface
@@ -1,312 +1,550 @@
-import pygame
-import os
-from pygame.locals import *
-from game.game_logic import ChessGame
-
-
-class ChessUI:
-    def __init__(self):
-        os.environ['SDL_AUDIODRIVER'] = 'dummy'
-        pygame.init()
-        
-        self.screen_width = 800
-        self.screen_height = 600
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        pygame.display.set_caption("Шахматы")
-        
-        self.cell_size = 60
-        self.board_offset = (50, 50)
-        
-        self.game = ChessGame()
-        self.in_menu = False
-        self.current_menu = 'main'
-        self.selected_option = 0
-        self.save_slots = 5
-        
-        self.font = pygame.font.SysFont('Arial', 24)
-        self.menu_font = pygame.font.SysFont('Arial', 36)
-        self.slot_font = pygame.font.SysFont('Arial', 18)
-        
-        self.settings = {
-            'visual': {
-                'light_color': (240, 217, 181),
-                'dark_color': (181, 136, 99),
-                'show_hints': True,
-                'piece_scale': 1.0
-            },
-            'sound': {
-                'enabled': True,
-                'volume': 0.5,
-                'move_sound': 'default',
-                'capture_sound': 'default'
-            },
-            'game': {
-                'animation_speed': 1.0,
-                'confirm_exit': True
-            }
-        }
-        
-        self.menu_options = {
-            'main': ['Продолжить', 'Новая игра', 'Сохранить игру', 'Загрузить игру', 'Настройки', 'Выход'],
-            'save': ['Слот 1', 'Слот 2', 'Слот 3', 'Слот 4', 'Слот 5', 'Назад'],
-            'load': ['Слот 1', 'Слот 2', 'Слот 3', 'Слот 4', 'Слот 5', 'Назад'],
-            'settings': [
-                'Цвет светлых клеток',
-                'Цвет темных клеток',
-                f"Показывать подсказки: {'Вкл' if self.settings['visual']['show_hints'] else 'Выкл'}",
-                f"Громкость звуков: {int(self.settings['sound']['volume'] * 100)}%",
-                f"Анимация: {'Вкл' if self.settings['game']['animation_speed'] > 0 else 'Выкл'}",
-                f"Подтверждение выхода: {'Вкл' if self.settings['game']['confirm_exit'] else 'Выкл'}",
-                'Сброс настроек',
-                'Назад'
-            ]
-        }
-        
-        self.load_images()
-
-    def load_images(self):
-        self.piece_images = {
-            'Pw': pygame.image.load(os.path.join('assets', 'images', 'white_pawn.png')).convert_alpha(),
-            'Rw': pygame.image.load(os.path.join('assets', 'images', 'white_rook.png')).convert_alpha(),
-            'Hw': pygame.image.load(os.path.join('assets', 'images', 'white_knight.png')).convert_alpha(),
-            'Bw': pygame.image.load(os.path.join('assets', 'images', 'white_bishop.png')).convert_alpha(),
-            'Qw': pygame.image.load(os.path.join('assets', 'images', 'white_queen.png')).convert_alpha(),
-            'Kw': pygame.image.load(os.path.join('assets', 'images', 'white_king.png')).convert_alpha(),
-            'Pb': pygame.image.load(os.path.join('assets', 'images', 'black_pawn.png')).convert_alpha(),
-            'Rb': pygame.image.load(os.path.join('assets', 'images', 'black_rook.png')).convert_alpha(),
-            'Hb': pygame.image.load(os.path.join('assets', 'images', 'black_knight.png')).convert_alpha(),
-            'Bb': pygame.image.load(os.path.join('assets', 'images', 'black_bishop.png')).convert_alpha(),
-            'Qb': pygame.image.load(os.path.join('assets', 'images', 'black_queen.png')).convert_alpha(),
-            'Kb': pygame.image.load(os.path.join('assets', 'images', 'black_king.png')).convert_alpha(),
-        }
-        
-        board_img_path = os.path.join('assets', 'images', 'board.png')
-        if os.path.exists(board_img_path):
-            self.board_image = pygame.image.load(board_img_path).convert_alpha()
-            self.board_image = pygame.transform.scale(self.board_image, 
-                                                   (self.cell_size * 8, self.cell_size * 8))
-        else:
-            self.board_image = pygame.Surface((self.cell_size * 8, self.cell_size * 8))
-            self.board_image.fill((0, 0, 0))
-
-    def draw_board(self):
-        self.screen.blit(self.board_image, self.board_offset)
-
-        if self.game.selected_piece is not None:
-            x, y = self.game.selected_piece
-            rect = pygame.Rect(
-                self.board_offset[0] + x * self.cell_size,
-                self.board_offset[1] + (7 - y) * self.cell_size,
-                self.cell_size,
-                self.cell_size
-            )
-            pygame.draw.rect(self.screen, (255, 255, 0), rect, 3)
-            
-            for move in self.game.possible_moves:
-                mx, my = move
-                rect = pygame.Rect(
-                    self.board_offset[0] + mx * self.cell_size,
-                    self.board_offset[1] + (7 - my) * self.cell_size,
-                    self.cell_size,
-                    self.cell_size
-                )
-                pygame.draw.rect(self.screen, (0, 255, 0), rect, 3)
-        
-        for y in range(8):
-            for x in range(8):
-                piece = self.game.board.get_piece((x, y))
-                if piece is not None:
-                    piece_key = f"{str(piece)[1]}{str(piece)[0].lower()}"
-                    if piece_key in self.piece_images:
-                        image = self.piece_images[piece_key]
-                        image = pygame.transform.scale(image, (self.cell_size, self.cell_size))
-                        self.screen.blit(
-                            image,
-                            (
-                                self.board_offset[0] + x * self.cell_size,
-                                self.board_offset[1] + (7 - y) * self.cell_size
-                            )
-                        )
-        
-        self.draw_captured_pieces()
-        
-        status_text = f"Ход: {'Белые' if self.game.board.current_player == 'white' else 'Чёрные'}"
-        if self.game.game_over:
-            status_text = f"Игра окончена! Победили: {'Белые' if self.game.winner == 'white' else 'Чёрные'}"
-        
-        text_surface = self.font.render(status_text, True, (255, 255, 255))
-        self.screen.blit(text_surface, (self.board_offset[0], self.board_offset[1] + 8 * self.cell_size + 20))
-        
-    def draw_captured_pieces(self):
-        white_x = self.board_offset[0] + 8 * self.cell_size + 20
-        black_x = self.board_offset[0] + 8 * self.cell_size + 20
-        y = self.board_offset[1]
-        
-        text_white = self.font.render("Белые взяли:", True, (255, 255, 255))
-        self.screen.blit(text_white, (white_x, y))
-        y += 30
-        
-        for i, piece in enumerate(self.game.board.captured_pieces['black']):
-            piece_key = f"{str(piece)[1]}{str(piece)[0].lower()}"
-            if piece_key in self.piece_images:
-                image = self.piece_images[piece_key]
-                image = pygame.transform.scale(image, (self.cell_size // 2, self.cell_size // 2))
-                self.screen.blit(image, (white_x + (i % 8) * (self.cell_size // 2 + 5), y + (i // 8) * (self.cell_size // 2 + 5)))
-        
-        y = self.board_offset[1] + 200
-        text_black = self.font.render("Чёрные взяли:", True, (255, 255, 255))
-        self.screen.blit(text_black, (black_x, y))
-        y += 30
-        
-        for i, piece in enumerate(self.game.board.captured_pieces['white']):
-            piece_key = f"{str(piece)[1]}{str(piece)[0].lower()}"
-            if piece_key in self.piece_images:
-                image = self.piece_images[piece_key]
-                image = pygame.transform.scale(image, (self.cell_size // 2, self.cell_size // 2))
-                self.screen.blit(image, (black_x + (i % 8) * (self.cell_size // 2 + 5), y + (i // 8) * (self.cell_size // 2 + 5)))
-        
-    def handle_click(self, pos):
-        if self.game.game_over:
-            return
-            
-        x = (pos[0] - self.board_offset[0]) // self.cell_size
-        y = 7 - (pos[1] - self.board_offset[1]) // self.cell_size
-        
-        if 0 <= x < 8 and 0 <= y < 8:
-            if self.game.selected_piece is None:
-                self.game.select_piece((x, y))
-            else:
-                if (x, y) in self.game.possible_moves:
-                    self.game.move_selected_piece((x, y))
-                else:
-                    self.game.select_piece((x, y))
-    
-    def draw_menu(self):
-        overlay = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        self.screen.blit(overlay, (0, 0))
-        
-        if self.current_menu == 'settings':
-            self.draw_settings()
-        else:
-            title = self.menu_font.render(
-                'Меню' if self.current_menu == 'main' else 
-                'Сохранение игры' if self.current_menu == 'save' else 
-                'Загрузка игры', True, (255, 255, 255))
-            title_rect = title.get_rect(center=(self.screen_width//2, self.screen_height//4))
-            self.screen.blit(title, title_rect)
-            
-            options = self.menu_options[self.current_menu]
-            for i, option in enumerate(options):
-                color = (255, 215, 0) if i == self.selected_option else (255, 255, 255)
-                
-                if self.current_menu in ['save', 'load'] and i < self.save_slots:
-                    save_info = self.game.get_save_slots()[i]
-                    if save_info['exists']:
-                        option_text = f"{option} ({save_info['date']})"
-                        info_text = f"Ход: {'белых' if save_info['player'] == 'white' else 'черных'}"
-                    else:
-                        option_text = f"{option} (пусто)"
-                        info_text = ""
-                else:
-                    option_text = option
-                    info_text = ""
-                
-                text = self.menu_font.render(option_text, True, color)
-                text_rect = text.get_rect(center=(self.screen_width//2, self.screen_height//2 + i*50))
-                self.screen.blit(text, text_rect)
-                
-                if info_text:
-                    info = self.slot_font.render(info_text, True, (200, 200, 200))
-                    info_rect = info.get_rect(center=(self.screen_width//2, self.screen_height//2 + i*50 + 30))
-                    self.screen.blit(info, info_rect)
-
-    def handle_menu_input(self):
-        keys = pygame.key.get_pressed()
-        
-        if self.current_menu == 'settings':
-            self.handle_settings_input()
-        else:
-            if keys[pygame.K_DOWN]:
-                self.selected_option = (self.selected_option + 1) % len(self.menu_options[self.current_menu])
-                pygame.time.delay(150)
-            
-            if keys[pygame.K_UP]:
-                self.selected_option = (self.selected_option - 1) % len(self.menu_options[self.current_menu])
-                pygame.time.delay(150)
-                
-            if keys[pygame.K_RETURN]:
-                option = self.menu_options[self.current_menu][self.selected_option]
-                
-                if self.current_menu == 'main':
-                    if option == 'Продолжить':
-                        self.in_menu = False
-                    elif option == 'Новая игра':
-                        self.game = ChessGame()
-                        self.in_menu = False
-                    elif option == 'Сохранить игру':
-                        self.current_menu = 'save'
-                        self.selected_option = 0
-                    elif option == 'Загрузить игру':
-                        self.current_menu = 'load'
-                        self.selected_option = 0
-                    elif option == 'Настройки':
-                        self.current_menu = 'settings'
-                        self.selected_option = 0
-                    elif option == 'Выход':
-                        pygame.quit()
-                        exit()
-                
-                elif self.current_menu == 'save':
-                    if option == 'Назад':
-                        self.current_menu = 'main'
-                        self.selected_option = 2
-                    elif self.selected_option < self.save_slots:
-                        if self.game.save_game(self.selected_option + 1):
-                            self.current_menu = 'main'
-                            self.selected_option = 0
-                
-                elif self.current_menu == 'load':
-                    if option == 'Назад':
-                        self.current_menu = 'main'
-                        self.selected_option = 3
-                    elif self.selected_option < self.save_slots:
-                        if self.game.load_game(self.selected_option + 1):
-                            self.in_menu = False
-                        else:
-                            print("Не удалось загрузить игру")
-        
-        if keys[pygame.K_ESCAPE]:
-            if self.current_menu == 'main':
-                self.in_menu = False
-            else:
-                self.current_menu = 'main'
-                self.selected_option = 0
-    
-    def run(self):
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    running = False
-                elif event.type == KEYDOWN:
-                    if event.key == K_ESCAPE:
-                        self.in_menu = not self.in_menu
-                        if self.in_menu:
-                            self.current_menu = 'main'
-                            self.selected_option = 0
-                    elif self.in_menu:
-                        self.handle_menu_input()
-                elif event.type == MOUSEBUTTONDOWN and not self.in_menu:
-                    if event.button == 1:
-                        self.handle_click(event.pos)
-            
-            self.screen.fill((50, 50, 50))
-            self.draw_board()
-            
-            if self.in_menu:
-                self.draw_menu()
-            
-            pygame.display.flip()
-        
+import pygame
+import os
+import time
+from pygame.locals import *
+from game.game_logic import ChessGame
+from game.profiling import profiler
+from game.search_worker import SearchWorker
+from ui.assets import draw_board, get_font, load_piece_images
+
+
+UI_PHASES = ('render', 'draw_board', 'draw_panels', 'draw_captured_pieces', 'draw_stats',
+             'draw_menu', 'draw_profile', 'flush', 'update_search')
+
+
+class ChessUI:
+    def __init__(self, profile=None):
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        pygame.init()
+        
+        self.screen_width = 800
+        self.screen_height = 600
+        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+        pygame.display.set_caption("Шахматы")
+        
+        self.cell_size = 60
+        self.board_offset = (50, 50)
+        
+        self.game = ChessGame()
+        self.search_worker = SearchWorker()
+        self.in_menu = False
+        self.current_menu = 'main'
+        self.selected_option = 0
+        self.menu_rows = 7
+        
+        self.font = get_font(24)
+        self.menu_font = get_font(36)
+        self.slot_font = get_font(18)
+        
+        self.settings = {
+            'visual': {
+                'light_color': (240, 217, 181),
+                'dark_color': (181, 136, 99),
+                'show_hints': True,
+                'piece_scale': 1.0
+            },
+            'sound': {
+                'enabled': True,
+                'volume': 0.5,
+                'move_sound': 'default',
+                'capture_sound': 'default'
+            },
+            'game': {
+                'animation_speed': 1.0,
+                'confirm_exit': True,
+                'save_slots': 100
+            }
+        }
+        
+        self.menu_options = {
+            'main': ['Продолжить', 'Новая игра', 'Игра с компьютером', 'Сохранить игру', 'Загрузить игру',
+                     'Настройки', 'Выход'],
+            'save': self.slot_options(),
+            'load': self.slot_options(),
+            'settings': [
+                'Цвет светлых клеток',
+                'Цвет темных клеток',
+                f"Показывать подсказки: {'Вкл' if self.settings['visual']['show_hints'] else 'Выкл'}",
+                f"Громкость звуков: {int(self.settings['sound']['volume'] * 100)}%",
+                f"Анимация: {'Вкл' if self.settings['game']['animation_speed'] > 0 else 'Выкл'}",
+                f"Подтверждение выхода: {'Вкл' if self.settings['game']['confirm_exit'] else 'Выкл'}",
+                'Сброс настроек',
+                'Назад'
+            ]
+        }
+        
+        self.background = (50, 50, 50)
+        self.fps_limit = 60
+        self.show_stats = False
+        self.clock = pygame.time.Clock()
+        self.sprite_cache = {}
+        self.sprite_key = None
+        self.board_layer = None
+        self.square_cache = [None] * 64
+        self.panel_cache = None
+        self.menu_state = None
+        self.force_redraw = True
+        self.frame_count = 0
+        self.frame_cpu = 0.0
+        self.stats_started = time.perf_counter()
+        self.stats_text = ''
+        self.drawn_stats = None
+        self._piece_images = None
+        
+        # Profiling is opt-in: without --profile no method is wrapped.
+        self.profile_path = profile
+        self.show_profile = False
+        self.profile_lines = []
+        if profile:
+            profiler.enable()
+            profiler.enable([(ChessUI, name, None) for name in UI_PHASES])
+
+    @property
+    def save_slots(self):
+        return self.settings['game']['save_slots']
+
+    def slot_options(self):
+        return [f'Слот {i}' for i in range(1, self.save_slots + 1)] + ['Назад']
+
+    @property
+    def piece_images(self):
+        if self._piece_images is None:
+            self._piece_images = load_piece_images()
+        return self._piece_images
+            
+    def update_render_cache(self):
+        visual = self.settings['visual']
+        key = (self.cell_size, visual['piece_scale'], visual['light_color'], visual['dark_color'])
+        if key == self.sprite_key:
+            return
+        self.sprite_key = key
+        self.sprite_cache = {}
+        self.board_layer = draw_board(self.cell_size, visual['light_color'], visual['dark_color'])
+        self.force_redraw = True
+        
+    def get_sprite(self, piece_key, size):
+        sprite = self.sprite_cache.get((piece_key, size))
+        if sprite is None:
+            sprite = pygame.transform.smoothscale(self.piece_images[piece_key], (size, size))
+            self.sprite_cache[(piece_key, size)] = sprite
+        return sprite
+        
+    def piece_key(self, piece):
+        return f"{str(piece)[1]}{str(piece)[0].lower()}"
+        
+    def square_rect(self, x, y):
+        return pygame.Rect(
+            self.board_offset[0] + x * self.cell_size,
+            self.board_offset[1] + (7 - y) * self.cell_size,
+            self.cell_size,
+            self.cell_size
+        )
+        
+    def square_states(self):
+        highlights = {}
+        search = self.game.last_search
+        if self.search_worker.busy and search is not None:
+            for position in search['move']:
+                highlights[position] = (80, 160, 255)
+        if self.game.selected_piece is not None:
+            for position in self.game.possible_moves:
+                highlights[position] = (0, 255, 0)
+            highlights[self.game.selected_piece] = (255, 255, 0)
+            
+        states = []
+        for y in range(8):
+            for x in range(8):
+                piece = self.game.board.board[y][x]
+                states.append((self.piece_key(piece) if piece is not None else None,
+                               highlights.get((x, y))))
+        return states
+
+    def draw_board(self, full=False):
+        self.update_render_cache()
+        full = full or self.force_redraw
+        if full:
+            self.screen.blit(self.board_layer, self.board_offset)
+            
+        dirty = []
+        states = self.square_states()
+        piece_size = int(self.cell_size * self.settings['visual']['piece_scale'])
+        inset = (self.cell_size - piece_size) // 2
+        for index, state in enumerate(states):
+            if not full and self.square_cache[index] == state:
+                continue
+            piece_key, highlight = state
+            rect = self.square_rect(index & 7, index >> 3)
+            if not full:
+                self.screen.blit(self.board_layer, rect,
+                                 rect.move(-self.board_offset[0], -self.board_offset[1]))
+            if highlight is not None:
+                pygame.draw.rect(self.screen, highlight, rect, 3)
+            if piece_key in self.piece_images:
+                self.screen.blit(self.get_sprite(piece_key, piece_size), (rect.x + inset, rect.y + inset))
+            dirty.append(rect)
+        self.square_cache = states
+        
+        dirty += self.draw_panels(full)
+        return dirty
+        
+    def panel_state(self):
+        status_text = f"Ход: {'Белые' if self.game.board.current_player == 'white' else 'Чёрные'}"
+        if self.game.game_over and self.game.winner is None:
+            status_text = "Игра окончена! Ничья"
+        elif self.game.game_over:
+            status_text = f"Игра окончена! Победили: {'Белые' if self.game.winner == 'white' else 'Чёрные'}"
+        elif self.game.tablebase_result is not None:
+            winner, plies = self.game.tablebase_result
+            status_text += (f"  (выигрывают {'белые' if winner == 'white' else 'чёрные'}, "
+                            f"мат за {(plies + 1) // 2})")
+            
+        search = self.game.last_search
+        search_text = ''
+        if search is not None:
+            search_text = f"Глубина: {search['depth']}  Узлов/с: {search['nps']}"
+        return (
+            status_text,
+            search_text,
+            self.search_worker.busy,
+            tuple(str(p) for p in self.game.board.captured_pieces['black']),
+            tuple(str(p) for p in self.game.board.captured_pieces['white']),
+        )
+        
+    def draw_panels(self, full=False):
+        state = self.panel_state()
+        if not full and state == self.panel_cache:
+            return []
+        self.panel_cache = state
+        status_text, search_text, thinking, _, _ = state
+        
+        board_bottom = self.board_offset[1] + 8 * self.cell_size
+        panel_x = self.board_offset[0] + 8 * self.cell_size + 20
+        side_rect = pygame.Rect(panel_x, 0, self.screen_width - panel_x, board_bottom)
+        status_rect = pygame.Rect(0, board_bottom + 1, self.screen_width, self.screen_height - board_bottom - 1)
+        self.screen.fill(self.background, side_rect)
+        self.screen.fill(self.background, status_rect)
+        
+        self.draw_captured_pieces()
+        
+        text_surface = self.font.render(status_text, True, (255, 255, 255))
+        self.screen.blit(text_surface, (self.board_offset[0], board_bottom + 20))
+        if thinking:
+            text_surface = self.font.render("Компьютер думает...", True, (80, 160, 255))
+            self.screen.blit(text_surface, (self.board_offset[0] + 250, board_bottom + 20))
+        if search_text:
+            text_surface = self.slot_font.render(search_text, True, (200, 200, 200))
+            self.screen.blit(text_surface, (self.board_offset[0], board_bottom + 50))
+        return [side_rect, status_rect]
+        
+    def draw_captured_pieces(self):
+        white_x = self.board_offset[0] + 8 * self.cell_size + 20
+        black_x = self.board_offset[0] + 8 * self.cell_size + 20
+        y = self.board_offset[1]
+        size = self.cell_size // 2
+        
+        text_white = self.font.render("Белые взяли:", True, (255, 255, 255))
+        self.screen.blit(text_white, (white_x, y))
+        y += 30
+        
+        for i, piece in enumerate(self.game.board.captured_pieces['black']):
+            piece_key = self.piece_key(piece)
+            if piece_key in self.piece_images:
+                image = self.get_sprite(piece_key, size)
+                self.screen.blit(image, (white_x + (i % 8) * (size + 5), y + (i // 8) * (size + 5)))
+        
+        y = self.board_offset[1] + 200
+        text_black = self.font.render("Чёрные взяли:", True, (255, 255, 255))
+        self.screen.blit(text_black, (black_x, y))
+        y += 30
+        
+        for i, piece in enumerate(self.game.board.captured_pieces['white']):
+            piece_key = self.piece_key(piece)
+            if piece_key in self.piece_images:
+                image = self.get_sprite(piece_key, size)
+                self.screen.blit(image, (black_x + (i % 8) * (size + 5), y + (i // 8) * (size + 5)))
+                
+    def draw_stats(self, full=False):
+        if not self.show_stats:
+            if self.drawn_stats is not None:
+                self.drawn_stats = None
+                self.force_redraw = True
+            return []
+        if not full and self.stats_text == self.drawn_stats:
+            return []
+        self.drawn_stats = self.stats_text
+        rect = pygame.Rect(0, 0, self.screen_width, self.board_offset[1] - 5)
+        self.screen.fill(self.background, rect)
+        text_surface = self.slot_font.render(self.stats_text, True, (200, 200, 200))
+        self.screen.blit(text_surface, (5, 5))
+        return [rect]
+        
+    def draw_profile(self):
+        if not self.profile_lines:
+            return
+        rect = pygame.Rect(self.board_offset[0], self.board_offset[1], 8 * self.cell_size,
+                           22 * len(self.profile_lines) + 10)
+        overlay = pygame.Surface(rect.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 220))
+        self.screen.blit(overlay, rect)
+        for i, line in enumerate(self.profile_lines):
+            for column, (x, text) in enumerate(zip((5, 290, 400, 470), line)):
+                text_surface = self.slot_font.render(text, True, (200, 255, 200))
+                # Numbers are right-aligned to the column edge.
+                offset = x if column == 0 else x - text_surface.get_width()
+                self.screen.blit(text_surface, (rect.x + offset, rect.y + 5 + 22 * i))
+        
+    def update_profile(self):
+        lines = [('функция', 'вызовы', 'мкс', 'макс')]
+        for timer in profiler.top(12):
+            lines.append((timer.name, str(timer.calls), f"{timer.total / timer.calls * 1e6:.0f}",
+                          f"{timer.max * 1e6:.0f}"))
+        self.profile_lines = lines
+        self.force_redraw = True
+        
+    def dump_profile(self):
+        if not self.profile_path:
+            return
+        profiler.dump_json(self.profile_path + '.json')
+        profiler.dump_stats(self.profile_path + '.pstats')
+        print(f"Профиль сохранён: {self.profile_path}.json, {self.profile_path}.pstats")
+        
+    def render(self):
+        self.update_render_cache()
+        menu_state = (self.current_menu, self.selected_option) if self.in_menu else None
+        full = self.force_redraw or menu_state != self.menu_state
+        self.menu_state = menu_state
+        
+        if self.in_menu:
+            if not full:
+                return []
+            self.screen.fill(self.background)
+            self.draw_board(full=True)
+            self.draw_menu()
+            self.force_redraw = False
+            return [self.screen.get_rect()]
+            
+        if full:
+            self.screen.fill(self.background)
+        dirty = self.draw_board(full)
+        dirty += self.draw_stats(full)
+        if full and self.show_profile:
+            self.draw_profile()
+        self.force_redraw = False
+        return [self.screen.get_rect()] if full else dirty
+        
+    def flush(self, dirty):
+        pygame.display.update(dirty)
+        
+    def update_frame_stats(self, cpu_time):
+        self.frame_count += 1
+        self.frame_cpu += cpu_time
+        now = time.perf_counter()
+        elapsed = now - self.stats_started
+        if elapsed >= 0.5:
+            fps = self.frame_count / elapsed
+            cpu_ms = self.frame_cpu / self.frame_count * 1000
+            self.stats_text = f"FPS: {fps:.0f}  CPU: {cpu_ms:.2f} мс/кадр"
+            if self.show_profile:
+                self.update_profile()
+            self.frame_count = 0
+            self.frame_cpu = 0.0
+            self.stats_started = now
+        
+    def handle_click(self, pos):
+        if self.game.game_over or self.game.is_ai_turn():
+            return
+            
+        x = (pos[0] - self.board_offset[0]) // self.cell_size
+        y = 7 - (pos[1] - self.board_offset[1]) // self.cell_size
+        
+        if 0 <= x < 8 and 0 <= y < 8:
+            if self.game.selected_piece is None:
+                self.game.select_piece((x, y))
+            else:
+                if self.game.can_move_to((x, y)):
+                    self.game.move_selected_piece((x, y))
+                else:
+                    self.game.select_piece((x, y))
+    
+    def draw_menu(self):
+        overlay = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        self.screen.blit(overlay, (0, 0))
+        
+        if self.current_menu == 'settings':
+            self.draw_settings()
+        else:
+            title = self.menu_font.render(
+                'Меню' if self.current_menu == 'main' else 
+                'Сохранение игры' if self.current_menu == 'save' else 
+                'Загрузка игры', True, (255, 255, 255))
+            title_rect = title.get_rect(center=(self.screen_width//2, self.screen_height//4))
+            self.screen.blit(title, title_rect)
+            
+            options = self.menu_options[self.current_menu]
+            first = max(0, min(self.selected_option - self.menu_rows // 2, len(options) - self.menu_rows))
+            slots = []
+            if self.current_menu in ['save', 'load']:
+                # Only the rows on screen are looked up in the slot index.
+                count = max(0, min(self.menu_rows, self.save_slots - first))
+                slots = self.game.get_save_slots(count, first + 1)
+            top = self.screen_height // 2 - 80
+            for row, i in enumerate(range(first, min(len(options), first + self.menu_rows))):
+                option = options[i]
+                color = (255, 215, 0) if i == self.selected_option else (255, 255, 255)
+                
+                if 0 <= i - first < len(slots):
+                    save_info = slots[i - first]
+                    if save_info['exists']:
+                        option_text = f"{option} ({save_info['date']})"
+                        info_text = f"Ход: {'белых' if save_info['player'] == 'white' else 'черных'}"
+                    else:
+                        option_text = f"{option} (пусто)"
+                        info_text = ""
+                else:
+                    option_text = option
+                    info_text = ""
+                
+                text = self.menu_font.render(option_text, True, color)
+                text_rect = text.get_rect(center=(self.screen_width//2, top + row*50))
+                self.screen.blit(text, text_rect)
+                
+                if info_text:
+                    info = self.slot_font.render(info_text, True, (200, 200, 200))
+                    info_rect = info.get_rect(center=(self.screen_width//2, top + row*50 + 30))
+                    self.screen.blit(info, info_rect)
+
+    def handle_menu_input(self):
+        keys = pygame.key.get_pressed()
+        
+        if self.current_menu == 'settings':
+            self.handle_settings_input()
+        else:
+            if keys[pygame.K_DOWN]:
+                self.selected_option = (self.selected_option + 1) % len(self.menu_options[self.current_menu])
+                pygame.time.delay(150)
+            
+            if keys[pygame.K_UP]:
+                self.selected_option = (self.selected_option - 1) % len(self.menu_options[self.current_menu])
+                pygame.time.delay(150)
+
+            if keys[pygame.K_PAGEDOWN]:
+                last = len(self.menu_options[self.current_menu]) - 1
+                self.selected_option = min(self.selected_option + self.menu_rows, last)
+                pygame.time.delay(150)
+
+            if keys[pygame.K_PAGEUP]:
+                self.selected_option = max(self.selected_option - self.menu_rows, 0)
+                pygame.time.delay(150)
+                
+            if keys[pygame.K_RETURN]:
+                option = self.menu_options[self.current_menu][self.selected_option]
+                
+                if self.current_menu == 'main':
+                    if option == 'Продолжить':
+                        self.in_menu = False
+                    elif option == 'Новая игра':
+                        self.search_worker.cancel()
+                        self.game = ChessGame()
+                        self.in_menu = False
+                    elif option == 'Игра с компьютером':
+                        self.search_worker.cancel()
+                        self.game = ChessGame(ai_color='black')
+                        self.in_menu = False
+                    elif option == 'Сохранить игру':
+                        self.current_menu = 'save'
+                        self.selected_option = 0
+                    elif option == 'Загрузить игру':
+                        self.current_menu = 'load'
+                        self.selected_option = 0
+                    elif option == 'Настройки':
+                        self.current_menu = 'settings'
+                        self.selected_option = 0
+                    elif option == 'Выход':
+                        self.search_worker.shutdown()
+                        self.dump_profile()
+                        pygame.quit()
+                        exit()
+                
+                elif self.current_menu == 'save':
+                    if option == 'Назад':
+                        self.current_menu = 'main'
+                        self.selected_option = 3
+                    elif self.selected_option < self.save_slots:
+                        if self.game.save_game(self.selected_option + 1):
+                            self.current_menu = 'main'
+                            self.selected_option = 0
+                
+                elif self.current_menu == 'load':
+                    if option == 'Назад':
+                        self.current_menu = 'main'
+                        self.selected_option = 4
+                    elif self.selected_option < self.save_slots:
+                        self.search_worker.cancel()
+                        if self.game.load_game(self.selected_option + 1):
+                            self.in_menu = False
+                        else:
+                            print("Не удалось загрузить игру")
+        
+        if keys[pygame.K_ESCAPE]:
+            if self.current_menu == 'main':
+                self.in_menu = False
+            else:
+                self.current_menu = 'main'
+                self.selected_option = 0
+    
+    def update_search(self):
+        for kind, payload in self.search_worker.poll():
+            if kind == 'info':
+                self.game.last_search = payload
+            elif kind == 'done' and self.search_worker.active_hash == self.game.board.hash:
+                self.game.apply_search_result(payload)
+            elif kind == 'error':
+                print(f"Ошибка поиска: {payload}")
+                
+        if not self.in_menu and self.game.is_ai_turn() and not self.search_worker.busy:
+            if not self.game.play_book_move():
+                self.search_worker.submit(self.game.board, self.game.ai_time)
+    
+    def run(self):
+        running = True
+        while running:
+            frame_start = time.process_time()
+            for event in pygame.event.get():
+                if event.type == QUIT:
+                    running = False
+                elif event.type == KEYDOWN:
+                    if event.key == K_ESCAPE:
+                        self.in_menu = not self.in_menu
+                        if self.in_menu:
+                            self.current_menu = 'main'
+                            self.selected_option = 0
+                    elif event.key == K_F2:
+                        self.show_stats = not self.show_stats
+                    elif event.key == K_F3 and profiler.enabled:
+                        self.show_profile = not self.show_profile
+                        self.profile_lines = []
+                        self.force_redraw = True
+                    elif event.key == K_BACKSPACE and not self.in_menu:
+                        self.search_worker.cancel()
+                        self.game.undo_move()
+                    elif self.in_menu:
+                        self.handle_menu_input()
+                elif event.type == MOUSEBUTTONDOWN and not self.in_menu:
+                    if event.button == 1:
+                        self.handle_click(event.pos)
+                elif event.type == VIDEOEXPOSE:
+                    self.force_redraw = True
+            
+            self.update_search()
+            
+            dirty = self.render()
+            if dirty:
+                self.flush(dirty)
+            
+            self.update_frame_stats(time.process_time() - frame_start)
+            self.clock.tick(self.fps_limit)
+        
+        self.search_worker.shutdown()
+        self.dump_profile()
         pygame.quit()
\ No newline at end of file